@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import os
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+class AdmissionLimiter:
+    """
+    Concurrency limit for one class of routes with a bounded wait queue.
+    Requests beyond `max_concurrency` wait for a slot; when `max_queue`
+    requests are already waiting, or the wait exceeds `queue_timeout`,
+    the request is shed with 503 and a Retry-After header.
+
+    Use as a route dependency: dependencies=[Depends(limiter)]
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        retry_after: int = 1
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    @classmethod
+    def from_env(cls, name: str, max_concurrency: int, max_queue: int, queue_timeout: float) -> 'AdmissionLimiter':
+        """Limiter configured by ADMISSION_<NAME>_CONCURRENCY / _QUEUE / _TIMEOUT / _RETRY_AFTER"""
+        prefix = f"ADMISSION_{name.upper()}_"
+        return cls(
+            name,
+            max_concurrency=int(os.getenv(prefix + "CONCURRENCY", str(max_concurrency))),
+            max_queue=int(os.getenv(prefix + "QUEUE", str(max_queue))),
+            queue_timeout=float(os.getenv(prefix + "TIMEOUT", str(queue_timeout))),
+            retry_after=int(os.getenv(prefix + "RETRY_AFTER", "1"))
+        )
+
+    def _overloaded(self, reason: str) -> HTTPException:
+        logger.warning(f"Shedding {self.name} request: {reason}")
+        return HTTPException(
+            status_code=503,
+            detail=f"Server busy ({self.name}): {reason}",
+            headers={"Retry-After": str(self.retry_after)}
+        )
+
+    async def acquire(self):
+        # Created lazily so it binds to the server's event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        if not self._semaphore.locked():
+            # Free slot: acquire() returns without suspending
+            await self._semaphore.acquire()
+        elif self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise self._overloaded("queue full")
+        else:
+            self.waiting += 1
+            try:
+                acquired = await self._wait_for_slot()
+            finally:
+                self.waiting -= 1
+            if not acquired:
+                self.timed_out += 1
+                raise self._overloaded("queue wait timed out")
+        self.active += 1
+        self.admitted += 1
+
+    async def _wait_for_slot(self) -> bool:
+        """
+        Wait up to queue_timeout for a permit; True once it is held. A permit
+        granted just as the wait times out or is cancelled is handed back,
+        which asyncio.wait_for does not guarantee before Python 3.12.
+        """
+        acquire = asyncio.ensure_future(self._semaphore.acquire())
+        acquired = False
+        try:
+            await asyncio.wait({acquire}, timeout=self.queue_timeout)
+            acquired = acquire.done()
+        finally:
+            if not acquired:
+                acquire.cancel()
+                acquire.add_done_callback(self._return_permit)
+        return acquired
+
+    def _return_permit(self, acquire: asyncio.Future):
+        if not acquire.cancelled():
+            self._semaphore.release()
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    async def __call__(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+# Route classes: CPU-heavy model work and cheap catalog reads
+ml_limiter = AdmissionLimiter.from_env("ml", max_concurrency=4, max_queue=16, queue_timeout=10.0)
+catalog_limiter = AdmissionLimiter.from_env("catalog", max_concurrency=64, max_queue=256, queue_timeout=5.0)
+
+limiters = {
+    limiter.name: limiter for limiter in (ml_limiter, catalog_limiter)
+}
+
+def get_admission_stats() -> Dict[str, Dict[str, float]]:
+    return {name: limiter.stats() for name, limiter in limiters.items()}
@@ -0,0 +1,134 @@
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+
+# max-age of catalog and price history responses; clients and proxies
+# revalidate with the ETag afterwards
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+
+@dataclass
+class CacheEntry:
+    payload: Any
+    etag: str
+    created: float
+
+def compute_etag(payload: Any) -> str:
+    """Strong ETag from the JSON encoding of a payload"""
+    body = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+class ResponseCache:
+    """
+    Small in-process cache of response payloads with their ETags.
+    Entries expire after `ttl_seconds` and the whole cache can be
+    invalidated when the underlying data changes.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, CacheEntry] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.monotonic() - entry.created > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            return entry
+
+    def set(self, key: Hashable, payload: Any) -> CacheEntry:
+        entry = CacheEntry(payload=payload, etag=compute_etag(payload), created=time.monotonic())
+        with self._lock:
+            if len(self._entries) >= self.max_entries and key not in self._entries:
+                # Drop the oldest entry
+                oldest = min(self._entries, key=lambda k: self._entries[k].created)
+                del self._entries[oldest]
+            self._entries[key] = entry
+        return entry
+
+    def get_or_set(self, key: Hashable, loader: Callable[[], Any]) -> CacheEntry:
+        entry = self.get(key)
+        if entry is None:
+            entry = self.set(key, loader())
+        return entry
+
+    def invalidate(self, *args, **kwargs):
+        """Drop every entry; accepts and ignores arguments so it can be used as a callback"""
+        with self._lock:
+            self._entries.clear()
+
+def if_none_match(request: Request, etag: str) -> bool:
+    """True when the client's If-None-Match header already covers `etag`"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in [tag.strip() for tag in header.split(",")]
+
+def if_modified_since(request: Request, last_modified: Optional[datetime]) -> bool:
+    """True when the client's If-Modified-Since is at or after `last_modified`"""
+    header = request.headers.get("if-modified-since")
+    if not header or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return as_utc(last_modified).replace(microsecond=0) <= since
+
+def not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """
+    Conditional request check: If-None-Match wins when present, as in
+    RFC 7232, otherwise If-Modified-Since is compared to `last_modified`
+    """
+    if request.headers.get("if-none-match"):
+        return if_none_match(request, etag)
+    return if_modified_since(request, last_modified)
+
+def as_utc(value: datetime) -> datetime:
+    """Stored timestamps are naive UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None, max_age: int = 0) -> Dict[str, str]:
+    """ETag, Last-Modified and Cache-Control headers for a shareable response"""
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}, must-revalidate"
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(as_utc(last_modified), usegmt=True)
+    return headers
+
+def cached_response(request: Request, entry: CacheEntry, headers: Optional[Dict[str, str]] = None) -> Response:
+    """304 when the client has the current version, otherwise the full JSON payload"""
+    headers = {"ETag": entry.etag, **(headers or {})}
+    if if_none_match(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(content=entry.payload, headers=headers)
+
+def conditional_response(
+    request: Request,
+    etag: str,
+    last_modified: Optional[datetime],
+    loader: Callable[[], Any],
+    max_age: int = HTTP_CACHE_MAX_AGE
+) -> Response:
+    """304 without calling `loader` when the client is current, otherwise its payload"""
+    headers = validator_headers(etag, last_modified, max_age)
+    if not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(content=loader(), headers=headers)
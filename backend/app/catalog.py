@@ -0,0 +1,220 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from functools import cached_property
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .models.commodity import Commodity, Price
+
+logger = logging.getLogger(__name__)
+
+# Seconds a loaded version is trusted before it is re-read; bounds how long
+# other workers keep serving 304s after an ingestion they did not see
+CATALOG_VERSION_TTL = float(os.getenv("CATALOG_VERSION_TTL", "30"))
+
+@dataclass(frozen=True)
+class CommodityVersion:
+    commodity_id: str
+    updated_at: Optional[datetime]
+    latest_price: Optional[datetime]
+    price_count: int
+
+    @property
+    def token(self) -> str:
+        updated = self.updated_at.isoformat() if self.updated_at else ""
+        latest = self.latest_price.isoformat() if self.latest_price else ""
+        return f"{self.commodity_id}:{updated}:{latest}:{self.price_count}"
+
+def normalize(text: Any) -> str:
+    """Lowercase identifier with runs of other characters collapsed to '-'"""
+    return re.sub(r"[^a-z0-9]+", "-", str(text).lower()).strip("-")
+
+@dataclass(frozen=True)
+class CommodityEntry:
+    id: Any
+    key: str
+    name: str
+    category: str
+
+class CommodityIndex:
+    """
+    In-memory lookup of the commodity catalog. Identifiers resolve by exact
+    alias (id, name, legacy '<name>-001' ids) in O(1), then by name prefix
+    through a trie in O(k). A substring match over the names is the last
+    resort, keeping the old ILIKE '%x%' behaviour without a table scan.
+    Numeric ids only ever match exactly: an unknown id is not a prefix of
+    another commodity's id.
+    """
+
+    def __init__(self, entries: List[CommodityEntry]):
+        self.entries = entries
+        self._aliases: Dict[str, CommodityEntry] = {}
+        self._trie: dict = {}
+        self._categories: Dict[str, List[CommodityEntry]] = {}
+        for entry in entries:
+            name = normalize(entry.name)
+            for alias in (normalize(entry.key), name, f"{name}-001", name.replace("-", "")):
+                if alias:
+                    self._aliases.setdefault(alias, entry)
+            self._insert_prefix(name, entry)
+            self._categories.setdefault(normalize(entry.category), []).append(entry)
+
+    def _insert_prefix(self, word: str, entry: CommodityEntry):
+        node = self._trie
+        for char in word:
+            node = node.setdefault(char, {})
+            # The first entry (catalog order) wins for a shared prefix
+            node.setdefault(None, entry)
+
+    def resolve(self, identifier: Any) -> Optional[CommodityEntry]:
+        """Commodity matching an id, name or name fragment, or None"""
+        key = normalize(identifier)
+        if not key:
+            return None
+        entry = self._aliases.get(key)
+        if entry or key.isdigit():
+            return entry
+
+        node = self._trie
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                break
+        else:
+            return node[None]
+
+        for entry in self.entries:
+            if key in normalize(entry.name):
+                return entry
+        return None
+
+    def in_category(self, category: str) -> List[CommodityEntry]:
+        """Commodities whose category contains `category` (case-insensitive)"""
+        key = normalize(category)
+        if key in self._categories:
+            return list(self._categories[key])
+        return [
+            entry
+            for name, entries in self._categories.items() if key in name
+            for entry in entries
+        ]
+
+@dataclass(frozen=True)
+class CatalogVersion:
+    """Last update, latest price timestamp and price count of every commodity at load time"""
+    commodities: Dict[str, CommodityVersion] = field(default_factory=dict)
+    index: CommodityIndex = field(default_factory=lambda: CommodityIndex([]))
+    loaded_at: float = 0.0
+    watermark: Tuple = ()
+
+    @cached_property
+    def latest_price(self) -> Optional[datetime]:
+        timestamps = [v.latest_price for v in self.commodities.values() if v.latest_price]
+        return max(timestamps) if timestamps else None
+
+    @cached_property
+    def token(self) -> str:
+        return "|".join(self.commodities[key].token for key in sorted(self.commodities))
+
+    def resolve(self, identifier: Any) -> Optional[CommodityEntry]:
+        return self.index.resolve(identifier)
+
+class CatalogVersions:
+    """
+    Cached view of the commodity catalog and how current its price data
+    is, used to resolve identifiers and answer conditional requests
+    without querying the database. Once it is older than `ttl_seconds`
+    a cheap watermark (newest price id, commodity count and last update)
+    is checked, and the full per-commodity scan only runs when that has
+    moved. `invalidate()`, which ingestion calls once it has committed new
+    rows, forces the full reload in this process.
+    """
+
+    def __init__(self, ttl_seconds: float = CATALOG_VERSION_TTL):
+        self.ttl_seconds = ttl_seconds
+        self._version: Optional[CatalogVersion] = None
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> CatalogVersion:
+        version = self._version
+        if version is None or time.monotonic() - version.loaded_at > self.ttl_seconds:
+            with self._lock:
+                version = self._version
+                if version is None or time.monotonic() - version.loaded_at > self.ttl_seconds:
+                    version = self._refresh(db, version)
+                    self._version = version
+        return version
+
+    def invalidate(self, *args, **kwargs):
+        """Force a reload on next use; accepts and ignores arguments so it can be used as a callback"""
+        self._version = None
+
+    def _refresh(self, db: Session, version: Optional[CatalogVersion]) -> CatalogVersion:
+        watermark = self._watermark(db)
+        if version is not None and version.watermark == watermark:
+            return replace(version, loaded_at=time.monotonic())
+        return self._load(db, watermark)
+
+    def _watermark(self, db: Session) -> Tuple:
+        """
+        Cheap reads that change whenever catalog or price data does: MAX of
+        the price primary key instead of a scan, which holds because prices
+        are only ever inserted (re-loads delete and insert again)
+        """
+        commodities = Commodity.__table__
+        prices = Price.__table__
+        price_id = db.execute(select(func.max(prices.c.id))).scalar()
+        count, updated_at = db.execute(
+            select(func.count(commodities.c.id), func.max(commodities.c.updated_at))
+        ).one()
+        return (price_id or 0, count, updated_at)
+
+    def _load(self, db: Session, watermark: Tuple) -> CatalogVersion:
+        commodities = Commodity.__table__
+        prices = Price.__table__
+        latest = select(
+            prices.c.commodity_id,
+            func.max(prices.c.timestamp).label("latest_price"),
+            func.count().label("price_count")
+        ).group_by(prices.c.commodity_id).subquery()
+        rows = db.execute(
+            select(
+                commodities.c.id,
+                commodities.c.name,
+                commodities.c.category,
+                commodities.c.updated_at,
+                latest.c.latest_price,
+                latest.c.price_count
+            )
+            .select_from(commodities.outerjoin(latest, latest.c.commodity_id == commodities.c.id))
+            .order_by(commodities.c.id)
+        ).all()
+
+        versions = {}
+        entries = []
+        for row in rows:
+            key = str(row.id)
+            versions[key] = CommodityVersion(key, row.updated_at, row.latest_price, row.price_count or 0)
+            entries.append(CommodityEntry(row.id, key, row.name or "", row.category or ""))
+        logger.info(f"Loaded catalog version for {len(versions)} commodities")
+        return CatalogVersion(versions, CommodityIndex(entries), time.monotonic(), watermark)
+
+def version_etag(*parts) -> str:
+    """Strong ETag from a route scope and the data versions it depends on"""
+    body = "\x1f".join(str(part) for part in parts)
+    return '"' + hashlib.sha1(body.encode("utf-8")).hexdigest() + '"'
+
+def commodity_validators(version: CatalogVersion, entry: CommodityEntry, *scope) -> Tuple[str, Optional[datetime]]:
+    """ETag and Last-Modified for a response about one commodity"""
+    commodity = version.commodities[entry.key]
+    return version_etag(*scope, commodity.token), commodity.latest_price
+
+catalog_versions = CatalogVersions()
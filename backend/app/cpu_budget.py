@@ -0,0 +1,162 @@
+"""
+CPU thread budget for the server processes.
+
+Every worker process gets an equal share of the usable cores (affinity
+and cgroup quota taken into account). Within a worker, that share is split
+between concurrent model tasks (ML executor, precompute and backtest pools)
+and the math threads each task may use (BLAS/OpenMP behind NumPy,
+statsmodels and scikit-learn, TensorFlow intra-op), so that
+workers x tasks x threads stays close to the core count instead of every
+library defaulting to all cores in every process.
+
+`apply()` has to run before NumPy or TensorFlow are imported for the
+environment variables to take effect; main.py calls it first thing.
+Libraries already loaded are limited at runtime through threadpoolctl.
+Explicit environment settings always win over the derived values.
+
+This module must not import NumPy.
+"""
+import logging
+import os
+import sys
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+BLAS_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+def cgroup_cpu_limit() -> Optional[float]:
+    """Cores allowed by the container's CPU quota, or None when unlimited"""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        if quota > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+def available_cores() -> int:
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    quota = cgroup_cpu_limit()
+    if quota is not None:
+        cores = min(cores, max(1, int(quota)))
+    return max(1, cores)
+
+def env_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+@dataclass(frozen=True)
+class CpuBudget:
+    cores: int
+    workers: int
+    cores_per_worker: int
+    ml_workers: int
+    threads_per_task: int
+    tf_intra_op_threads: int
+    tf_inter_op_threads: int
+
+    @classmethod
+    def from_environment(cls) -> "CpuBudget":
+        cores = env_int("CPU_BUDGET_CORES") or available_cores()
+        workers = max(1, env_int("WEB_CONCURRENCY") or 1)
+        per_worker = max(1, cores // workers)
+        ml_workers = env_int("ML_EXECUTOR_WORKERS") or min(4, per_worker)
+        threads_per_task = env_int("CPU_THREADS_PER_TASK") or max(1, per_worker // ml_workers)
+        return cls(
+            cores=cores,
+            workers=workers,
+            cores_per_worker=per_worker,
+            ml_workers=ml_workers,
+            threads_per_task=threads_per_task,
+            tf_intra_op_threads=env_int("TF_NUM_INTRAOP_THREADS") or threads_per_task,
+            # The LSTM graph is sequential; more inter-op threads only add contention
+            tf_inter_op_threads=env_int("TF_NUM_INTEROP_THREADS") or 1,
+        )
+
+    def apply(self):
+        """Export the thread limits and apply them to libraries that are already loaded"""
+        for name in BLAS_ENV_VARS:
+            os.environ.setdefault(name, str(self.threads_per_task))
+        os.environ.setdefault("TF_NUM_INTRAOP_THREADS", str(self.tf_intra_op_threads))
+        os.environ.setdefault("TF_NUM_INTEROP_THREADS", str(self.tf_inter_op_threads))
+
+        if "numpy" in sys.modules:
+            try:
+                from threadpoolctl import threadpool_limits
+                threadpool_limits(limits=int(os.environ["OMP_NUM_THREADS"]))
+            except ImportError:
+                logger.warning("threadpoolctl is not installed; BLAS thread limits apply to new processes only")
+        if "tensorflow" in sys.modules:
+            configure_tensorflow(sys.modules["tensorflow"], self)
+
+        logger.info(
+            f"CPU budget: {self.cores} cores / {self.workers} workers -> {self.ml_workers} ML tasks "
+            f"x {self.threads_per_task} threads per worker"
+        )
+
+def configure_tensorflow(tf, budget: CpuBudget):
+    """Set TensorFlow's thread pools; only possible before it has run anything"""
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(budget.tf_intra_op_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(budget.tf_inter_op_threads)
+    except RuntimeError as e:
+        logger.warning(f"TensorFlow is already initialized, thread limits unchanged: {str(e)}")
+
+def get_cpu_diagnostics() -> dict:
+    """Budget and the thread settings actually in effect in this process"""
+    from .executors import ML_EXECUTOR_WORKERS
+    from .jobs.precompute_forecasts import PRECOMPUTE_WORKERS
+
+    diagnostics = {
+        "pid": os.getpid(),
+        "os_cpu_count": os.cpu_count(),
+        "cgroup_cpu_limit": cgroup_cpu_limit(),
+        "budget": asdict(cpu_budget),
+        "pools": {
+            "ml_executor_workers": ML_EXECUTOR_WORKERS,
+            "precompute_workers": PRECOMPUTE_WORKERS,
+            "backtest_processes": cpu_budget.ml_workers,
+        },
+        "environment": {name: os.getenv(name) for name in BLAS_ENV_VARS + ("TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS")},
+        "native_thread_pools": [],
+        "tensorflow": None,
+    }
+    try:
+        from threadpoolctl import threadpool_info
+        diagnostics["native_thread_pools"] = [
+            {key: info.get(key) for key in ("user_api", "internal_api", "prefix", "version", "num_threads")}
+            for info in threadpool_info()
+        ]
+    except ImportError:
+        pass
+    tf = sys.modules.get("tensorflow")
+    if tf is not None:
+        diagnostics["tensorflow"] = {
+            "intra_op_threads": tf.config.threading.get_intra_op_parallelism_threads(),
+            "inter_op_threads": tf.config.threading.get_inter_op_parallelism_threads(),
+        }
+    return diagnostics
+
+cpu_budget = CpuBudget.from_environment()
@@ -1,19 +1,25 @@
 import pandas as pd
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
 from sqlalchemy.orm import Session
-from .models.commodity import Commodity, Price
+from .models.commodity import Commodity, ForecastAccuracy, Prediction, Price
+from .catalog import catalog_versions
+from .utils import insert_price_frame
 import logging
+import random
 import re
 
 logger = logging.getLogger(__name__)
 
-def load_csv_data(db: Session):
-    """Load data from CSV files into the database"""
+def load_csv_data(db: Session, csv_dir: Optional[Path] = None):
+    """Load data from CSV files (backend/csv_files by default) into the database"""
     try:
-        # Get the project root directory
-        project_root = Path(__file__).parent.parent
-        csv_dir = project_root / 'csv_files'
+        if csv_dir is None:
+            # Get the project root directory
+            project_root = Path(__file__).parent.parent
+            csv_dir = project_root / 'csv_files'
+        csv_dir = Path(csv_dir)
         
         if not csv_dir.exists():
             logger.warning(f"CSV directory not found: {csv_dir}")
@@ -58,27 +64,34 @@ def load_csv_data(db: Session):
             }
         }
 
-        # First, clear existing data
+        # First, clear existing data; forecasts and their accuracy totals
+        # reference the commodities, so they go before them
+        db.query(ForecastAccuracy).delete()
+        db.query(Prediction).delete()
         db.query(Price).delete()
         db.query(Commodity).delete()
         db.commit()
         logger.info("Cleared existing data")
 
-        # Create commodities
-        for commodity_id, info in commodity_mappings.items():
+        # Create commodities; ids are assigned by the database (commodities.id
+        # is an integer) and keys such as 'wheat-001' resolve through the catalog index
+        commodity_ids = {}
+        for key, info in commodity_mappings.items():
             commodity = Commodity(
-                id=commodity_id,
                 name=info['name'],
                 description=info['description'],
                 unit=info['unit'],
                 category=info['category']
             )
             db.add(commodity)
+            db.flush()
+            commodity_ids[key] = commodity.id
             logger.info(f"Added commodity: {info['name']}")
         db.commit()
 
         # Load price data for each commodity
-        for commodity_id, info in commodity_mappings.items():
+        for key, info in commodity_mappings.items():
+            commodity_id = commodity_ids[key]
             csv_path = csv_dir / info['file']
             if not csv_path.exists():
                 logger.warning(f"CSV file not found: {csv_path}")
@@ -89,6 +102,7 @@ def load_csv_data(db: Session):
                 with open(csv_path, 'r') as file:
                     lines = file.readlines()
                 
+                rows = []
                 # Skip the title and unit rows
                 for line in lines[2:]:  # Skip the first two rows
                     if not line.strip():
@@ -108,32 +122,29 @@ def load_csv_data(db: Session):
                             try:
                                 date = datetime.strptime(month_str, '%b %Y')
                                 
-                                # Create a random volume for demonstration
-                                import random
-                                volume = random.randint(100, 1000)
-                                
-                                # Create price entry
-                                price = Price(
-                                    commodity_id=commodity_id,
-                                    price=price_value,
-                                    timestamp=date,
-                                    source="csv_import",
-                                    volume=volume,
-                                    currency="INR"
-                                )
-                                db.add(price)
-                                logger.info(f"Added price for {info['name']}: {date.strftime('%Y-%m-%d')} - {price_value}")
+                                rows.append({
+                                    'commodity_id': commodity_id,
+                                    'price': price_value,
+                                    'timestamp': date,
+                                    'source': "csv_import",
+                                    # Create a random volume for demonstration
+                                    'volume': random.randint(100, 1000),
+                                    'currency': "INR"
+                                })
                             except ValueError as e:
                                 logger.error(f"Error parsing date '{month_str}': {e}")
                 
-                db.commit()
-                logger.info(f"Loaded price data for {info['name']}")
+                # One bulk insert (and commit) per file
+                if rows:
+                    insert_price_frame(db, pd.DataFrame(rows))
+                logger.info(f"Loaded {len(rows)} prices for {info['name']}")
                 
             except Exception as file_error:
                 logger.error(f"Error processing file {info['file']}: {file_error}")
                 db.rollback()
                 continue
 
+        catalog_versions.invalidate()
         logger.info("Successfully loaded all CSV data")
         
     except Exception as e:
@@ -1,8 +1,15 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
+import logging
 import os
 from dotenv import load_dotenv
+from .instrumentation import instrument_engine, read_pool_state, register_pool_gauges
+from .replication import monitor_replica, read_routes
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
@@ -13,23 +20,125 @@ DB_PASSWORD = os.getenv("DB_PASSWORD", "qwerty")
 DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_NAME = os.getenv("DB_NAME", "agri_price_db")
 
-# MySQL connection URL
-SQLALCHEMY_DATABASE_URL = f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+# Any SQLAlchemy URL, e.g. sqlite:////var/lib/agri/prices.db or duckdb:////var/lib/agri/prices.duckdb
+# (DuckDB needs the duckdb-engine package); defaults to MySQL built from the DB_* settings
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL") or \
+    f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+
+# Server processes sharing the database server's connection budget (uvicorn/gunicorn --workers)
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "100"))
+# Explicit pool sizes override the derived ones
+DB_POOL_SIZE = os.getenv("DB_POOL_SIZE")
+DB_MAX_OVERFLOW = os.getenv("DB_MAX_OVERFLOW")
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Read-only replicas: SQLite connections run with query_only, DuckDB opens the file read-only
+DB_READ_ONLY = os.getenv("DB_READ_ONLY", "false").lower() == "true"
+
+# Optional read replica serving the read-only routes (commodity catalog, price history)
+REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL", "")
+# Reads go to the primary while the replica is this many seconds behind it
+REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", "30"))
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", "5"))
+
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))
+
+def pool_sizes(per_process_limit: int = None, default_size: int = 5, default_overflow: int = 10):
+    """(pool_size, max_overflow), capped at `per_process_limit` connections unless set explicitly"""
+    pool_size = int(DB_POOL_SIZE) if DB_POOL_SIZE else default_size
+    max_overflow = int(DB_MAX_OVERFLOW) if DB_MAX_OVERFLOW else default_overflow
+    if per_process_limit is not None:
+        if not DB_POOL_SIZE:
+            pool_size = max(1, min(pool_size, per_process_limit))
+        if not DB_MAX_OVERFLOW:
+            max_overflow = max(0, min(max_overflow, per_process_limit - pool_size))
+    return pool_size, max_overflow
+
+def engine_options(url, read_only: bool = DB_READ_ONLY) -> dict:
+    """create_engine arguments for the backend of `url`"""
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        if url.database in (None, "", ":memory:"):
+            # One shared connection, otherwise every checkout sees a new empty database
+            return {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+        # Embedded: no server-side limit, so the pool is per process. WAL lets
+        # readers run alongside the single writer; busy writers wait on the lock
+        pool_size, max_overflow = pool_sizes()
+        return {
+            "poolclass": QueuePool,
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "connect_args": {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT},
+        }
+    if backend == "duckdb":
+        # A file can be opened by one writing process or many read-only ones
+        if WEB_CONCURRENCY > 1 and not read_only:
+            logger.warning("DuckDB files can only be shared by several workers read-only; set DB_READ_ONLY=true")
+        pool_size, max_overflow = pool_sizes(default_size=4, default_overflow=0)
+        return {
+            "poolclass": QueuePool,
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "connect_args": {"read_only": read_only},
+        }
+    # Client/server databases: split the server's connection budget across the workers
+    pool_size, max_overflow = pool_sizes(per_process_limit=max(1, DB_MAX_CONNECTIONS // WEB_CONCURRENCY))
+    return {
+        "pool_size": pool_size,  # Number of connections to maintain
+        "max_overflow": max_overflow,  # Maximum number of connections to allow
+        "pool_timeout": DB_POOL_TIMEOUT,  # Timeout in seconds
+        "pool_recycle": 1800,  # Recycle connections after 30 minutes
+    }
+
+def configure_sqlite(engine, read_only: bool = False):
+    """Pragmas applied to every new SQLite connection"""
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            if read_only:
+                cursor.execute("PRAGMA query_only=ON")
+            else:
+                cursor.execute("PRAGMA journal_mode=WAL")
+                # Durable at checkpoints; a power loss can only drop the last commits
+                cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+            cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+        finally:
+            cursor.close()
+
+def create_database_engine(url: str, name: str, read_only: bool = DB_READ_ONLY):
+    """Engine for `url` with backend-specific pooling, instrumented for /metrics as `name`"""
+    parsed = make_url(url)
+    new_engine = create_engine(url, **engine_options(parsed, read_only))
+    if parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:"):
+        configure_sqlite(new_engine, read_only)
+    # Query timings, per-request query counts and pool checkout waits for /metrics
+    instrument_engine(new_engine)
+    register_pool_gauges(name, new_engine)
+    logger.info(f"Database engine '{name}': {parsed.get_backend_name()} ({type(new_engine.pool).__name__})")
+    return new_engine
 
-# Create MySQL engine with specific configuration
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    pool_size=5,  # Number of connections to maintain
-    max_overflow=10,  # Maximum number of connections to allow
-    pool_timeout=30,  # Timeout in seconds
-    pool_recycle=1800,  # Recycle connections after 30 minutes
-)
+engine = create_database_engine(SQLALCHEMY_DATABASE_URL, "primary")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+replica_engine = None
+ReplicaSessionLocal = None
+replica_monitor = None
+if REPLICA_DATABASE_URL:
+    replica_engine = create_database_engine(REPLICA_DATABASE_URL, "replica", read_only=True)
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    replica_monitor = monitor_replica(engine, replica_engine, REPLICA_MAX_LAG, REPLICA_CHECK_INTERVAL)
+
 Base = declarative_base()
 
-# Dependency to get DB session
+# Dependency to get DB session (primary; use for anything that writes)
 def get_db():
     db = SessionLocal()
     try:
@@ -37,6 +146,32 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db():
+    """Session for read-only routes: the replica while it is reachable and caught up, else the primary"""
+    if replica_monitor is None:
+        db = SessionLocal()
+    else:
+        route = replica_monitor.route()
+        if route == "replica":
+            read_routes.inc(engine="replica", reason="healthy")
+            db = ReplicaSessionLocal()
+        else:
+            read_routes.inc(engine="primary", reason=route)
+            db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_database_stats():
+    """Pool usage per engine and replica health"""
+    stats = {}
+    for (name, state), value in read_pool_state().items():
+        stats.setdefault(name, {})[state] = value
+    if replica_monitor is not None:
+        stats.setdefault("replica", {})["health"] = replica_monitor.stats()
+    return stats
+
 # Initialize database
 def init_db():
-    Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
@@ -0,0 +1,250 @@
+"""
+In-process pub/sub for live price and forecast updates.
+
+Ingestion and the forecast precompute publish one event per commodity;
+the event is encoded once and fanned out to every subscribed stream with
+a single wake-up per event loop, so thousands of open dashboards cost one
+upstream update instead of one poll each. Each subscriber has a bounded
+queue and a slow client loses its oldest events rather than holding
+memory.
+
+Writers in other processes (the CSV loader, other workers) are picked up
+by a watcher that compares the cached catalog version while anyone is
+subscribed, so their prices arrive within CATALOG_VERSION_TTL.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import orjson
+import pandas as pd
+from sqlalchemy import and_, func, select
+
+from .catalog import catalog_versions
+from .database import get_read_db
+from .metrics import registry
+from .models.commodity import Price
+
+logger = logging.getLogger(__name__)
+
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "100"))
+SSE_MAX_SUBSCRIBERS = int(os.getenv("SSE_MAX_SUBSCRIBERS", "10000"))
+SSE_HEARTBEAT = float(os.getenv("SSE_HEARTBEAT", "15"))
+# Seconds between catalog checks for prices written by other processes
+SSE_POLL_INTERVAL = float(os.getenv("SSE_POLL_INTERVAL", "5"))
+
+ALL_COMMODITIES = "*"
+
+published_events = registry.counter("sse_events_published_total", "Events published to live streams", ("event",))
+dropped_events = registry.counter("sse_events_dropped_total", "Events dropped for slow stream clients")
+
+def encode_event(event_id: int, event: str, data: Any) -> bytes:
+    """One server-sent event frame"""
+    body = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (event_id, event.encode(), body)
+
+class Subscription:
+    def __init__(self, topics: Set[str], loop: asyncio.AbstractEventLoop, maxsize: int = SSE_QUEUE_SIZE):
+        self.topics = topics
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    def deliver(self, payload: bytes):
+        """Queue an encoded event; runs on the subscriber's loop"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            dropped_events.inc()
+        self.queue.put_nowait(payload)
+
+class EventBroker:
+    """Topic (commodity id) -> subscriptions; `publish` may be called from any thread"""
+
+    def __init__(self):
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self._count = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # Newest price timestamp published per commodity, so the watcher skips what ingestion already sent
+        self.published_prices: Dict[str, datetime] = {}
+        self._watcher: Optional[asyncio.Task] = None
+
+    def has_subscribers(self) -> bool:
+        return self._count > 0
+
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        """Subscribe the calling event loop's task to `topics` (ALL_COMMODITIES for every commodity)"""
+        subscription = Subscription(set(topics) or {ALL_COMMODITIES}, asyncio.get_running_loop())
+        with self._lock:
+            for topic in subscription.topics:
+                self._topics.setdefault(topic, set()).add(subscription)
+            self._count += 1
+        if self._watcher is None or self._watcher.done():
+            self._watcher = asyncio.ensure_future(self.watch_catalog())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._topics.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._topics[topic]
+            self._count -= 1
+
+    def publish(self, topic: str, event: str, data: Any):
+        """Fan an event out to the subscribers of `topic` and of every commodity"""
+        with self._lock:
+            subscribers = self._topics.get(topic, set()) | self._topics.get(ALL_COMMODITIES, set())
+        if not subscribers:
+            return
+        payload = encode_event(next(self._ids), event, data)
+        published_events.inc(event=event)
+        by_loop: Dict[asyncio.AbstractEventLoop, List[Subscription]] = {}
+        for subscription in subscribers:
+            by_loop.setdefault(subscription.loop, []).append(subscription)
+        for loop, targets in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(deliver_all, targets, payload)
+            except RuntimeError:
+                # The loop has shut down
+                pass
+
+    def publish_prices(self, latest: Iterable[Dict[str, Any]]):
+        """Price events from rows with commodity_id, price, timestamp and volume"""
+        for row in latest:
+            key = str(row["commodity_id"])
+            timestamp = row["timestamp"]
+            previous = self.published_prices.get(key)
+            if previous is not None and timestamp <= previous:
+                continue
+            self.published_prices[key] = timestamp
+            self.publish(key, "price", {
+                "commodity_id": row["commodity_id"],
+                "price": row["price"],
+                "timestamp": timestamp.isoformat(),
+                "volume": row.get("volume"),
+            })
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "subscribers": self._count,
+                "topics": {topic: len(subscribers) for topic, subscribers in self._topics.items()},
+            }
+
+    async def watch_catalog(self):
+        """Publish prices other processes wrote, while anyone is subscribed"""
+        loop = asyncio.get_running_loop()
+        previous = None
+        while self.has_subscribers():
+            try:
+                version = await loop.run_in_executor(None, load_catalog_version)
+                current = {key: v.latest_price for key, v in version.commodities.items()}
+                if previous is not None:
+                    changed = [
+                        key for key, latest in current.items()
+                        if latest is not None and latest != previous.get(key)
+                        and (key not in self.published_prices or latest > self.published_prices[key])
+                    ]
+                    if changed:
+                        rows = await loop.run_in_executor(None, load_latest_prices, changed)
+                        self.publish_prices(rows)
+                previous = current
+            except Exception as e:
+                logger.warning(f"Live price watcher failed: {str(e)}")
+            await asyncio.sleep(SSE_POLL_INTERVAL)
+
+def deliver_all(subscriptions: List[Subscription], payload: bytes):
+    for subscription in subscriptions:
+        subscription.deliver(payload)
+
+read_session = contextmanager(get_read_db)
+
+def load_catalog_version():
+    with read_session() as db:
+        return catalog_versions.get(db)
+
+def load_latest_prices(commodity_keys: List[str]) -> List[Dict[str, Any]]:
+    """Newest price row of each commodity"""
+    prices = Price.__table__
+    ids = [int(key) if key.isdigit() else key for key in commodity_keys]
+    latest = select(prices.c.commodity_id, func.max(prices.c.timestamp).label("timestamp"))\
+        .where(prices.c.commodity_id.in_(ids))\
+        .group_by(prices.c.commodity_id)\
+        .subquery()
+    with read_session() as db:
+        rows = db.execute(
+            select(prices.c.commodity_id, prices.c.price, prices.c.timestamp, prices.c.volume)
+            .join(latest, and_(prices.c.commodity_id == latest.c.commodity_id, prices.c.timestamp == latest.c.timestamp))
+        ).all()
+    return [dict(row._mapping) for row in rows]
+
+event_broker = EventBroker()
+
+def publish_price_records(records: List[Dict[str, Any]]):
+    """Publish the newest of just-inserted price records per commodity"""
+    if not event_broker.has_subscribers():
+        return
+    latest: Dict[Any, Dict[str, Any]] = {}
+    for record in records:
+        current = latest.get(record["commodity_id"])
+        if record.get("timestamp") is not None and (current is None or record["timestamp"] > current["timestamp"]):
+            latest[record["commodity_id"]] = record
+    event_broker.publish_prices(latest.values())
+
+def publish_price_frame(prices: pd.DataFrame):
+    """Publish the newest row per commodity of a just-inserted price frame"""
+    if not event_broker.has_subscribers() or prices.empty:
+        return
+    newest = prices.loc[prices.groupby("commodity_id")["timestamp"].idxmax()]
+    event_broker.publish_prices({
+        "commodity_id": row.commodity_id.item() if hasattr(row.commodity_id, "item") else row.commodity_id,
+        "price": float(row.price),
+        "timestamp": pd.Timestamp(row.timestamp).to_pydatetime(),
+        "volume": int(row.volume) if "volume" in prices and pd.notna(row.volume) else None,
+    } for row in newest.itertuples(index=False))
+
+def publish_forecasts(records: List[Dict[str, Any]], model_names: Dict[int, str]):
+    """One forecast event per commodity and model from just-inserted prediction records"""
+    if not event_broker.has_subscribers():
+        return
+    runs: Dict[tuple, List[Dict[str, Any]]] = {}
+    for record in records:
+        runs.setdefault((record["commodity_id"], record["model_id"]), []).append(record)
+    for (commodity_id, model_id), rows in runs.items():
+        rows.sort(key=lambda row: row["horizon"])
+        event_broker.publish(str(commodity_id), "forecast", {
+            "commodity_id": commodity_id,
+            "model": model_names.get(model_id, str(model_id)),
+            "prediction_date": rows[0]["prediction_date"].isoformat(),
+            "run_type": rows[0]["run_type"],
+            "forecast": [{
+                "date": row["target_date"].isoformat(),
+                "price": row["predicted_price"],
+                "lower": row["confidence_lower"],
+                "upper": row["confidence_upper"],
+            } for row in rows],
+        })
+
+class EventStreamGZipMiddleware:
+    """GZip for regular responses; event streams pass through so each event is flushed as it is sent"""
+
+    def __init__(self, app, minimum_size: int = 500):
+        from starlette.middleware.gzip import GZipMiddleware
+
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            accept = next((value for key, value in scope["headers"] if key == b"accept"), b"")
+            if b"text/event-stream" in accept:
+                await self.app(scope, receive, send)
+                return
+        await self.gzip(scope, receive, send)
@@ -0,0 +1,30 @@
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+
+from .cpu_budget import cpu_budget
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    Runs each job in a copy of the submitter's contextvars, as
+    asyncio.to_thread does (loop.run_in_executor does not), so queries
+    made by the job count towards the request that submitted it.
+    """
+
+    def submit(self, fn, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+# Dedicated pool for Keras/statsmodels work (training, inference, backtests)
+# so heavy model calls never occupy the threads that serve catalog requests;
+# sized by the CPU budget unless ML_EXECUTOR_WORKERS is set
+ML_EXECUTOR_WORKERS = cpu_budget.ml_workers
+
+ml_executor = ContextThreadPoolExecutor(max_workers=ML_EXECUTOR_WORKERS, thread_name_prefix="ml")
+
+def get_executor_stats():
+    """Queue depth of the ML pool (work submitted but not yet started)"""
+    return {
+        "ml": {
+            "max_workers": ML_EXECUTOR_WORKERS,
+            "queued": ml_executor._work_queue.qsize(),
+        }
+    }
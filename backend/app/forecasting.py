@@ -0,0 +1,210 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .executors import ml_executor
+from .ml_models.model_manager import model_manager
+from .profiling import in_profile, span
+from .models.commodity import Prediction, Price
+from .utils import get_model_id, save_prediction
+
+logger = logging.getLogger(__name__)
+
+# Model names accepted by the API and the models they expand to
+MODEL_SELECTIONS = {
+    "lstm": ["lstm"],
+    "arima": ["arima"],
+    "lstm_arima": ["lstm", "arima"],
+}
+
+# Horizons (months) served from precomputed forecasts
+STANDARD_HORIZONS = sorted(
+    int(h) for h in os.getenv("STANDARD_HORIZONS", "1,3,6,12").split(",") if h.strip()
+)
+# Precomputed runs older than this are ignored
+PRECOMPUTED_MAX_AGE_HOURS = float(os.getenv("PRECOMPUTED_MAX_AGE_HOURS", "26"))
+
+def selected_models(model_name: str) -> List[str]:
+    """Models that make up a requested model name"""
+    return MODEL_SELECTIONS.get(model_name.lower(), [])
+
+def forecast_dates(prediction_horizon: int, today: Optional[datetime] = None) -> List[datetime]:
+    """First day of each of the next `prediction_horizon` months"""
+    today = today or datetime.now()
+    future_dates = []
+    for i in range(prediction_horizon):
+        month = (today.month + i) % 12 + 1
+        year = today.year + ((today.month + i) // 12)
+        future_dates.append(datetime(year, month, 1))
+    return future_dates
+
+def number_predictions(predictions: List[dict]) -> List[dict]:
+    """Assign the sequential ids used in API responses"""
+    for i, prediction in enumerate(predictions):
+        prediction["id"] = i + 1
+    return predictions
+
+def forecast_rows(commodity_id: int, model: str, forecast: dict, future_dates: List[datetime]) -> List[dict]:
+    """API rows from a model forecast; step i is the month future_dates[i]"""
+    return [{
+        "commodity_id": str(commodity_id),
+        "value": float(value),
+        "prediction_date": target_date.strftime('%Y-%m-%d'),
+        "model_name": model,
+        "days_ahead": i + 1,
+        "confidence_lower": float(bounds["lower"]),
+        "confidence_upper": float(bounds["upper"])
+    } for i, (value, bounds, target_date) in enumerate(zip(
+        forecast["predictions"], forecast["confidence"], future_dates
+    ))]
+
+def monthly_prices(timestamps, prices) -> np.ndarray:
+    """
+    Mean price per calendar month, oldest first. Forecast steps are labelled
+    as month starts (forecast_dates), so daily or irregular histories are
+    resampled to one observation per month before they reach a model.
+    """
+    series = pd.Series(np.asarray(prices, dtype=float), index=pd.DatetimeIndex(timestamps))
+    return series.resample("MS").mean().dropna().to_numpy()
+
+def load_price_history(commodity_id: int) -> np.ndarray:
+    """Monthly prices of a commodity, oldest first, read in a session of its own"""
+    table = Price.__table__
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(table.c.timestamp, table.c.price)
+            .where(table.c.commodity_id == commodity_id)
+            .order_by(table.c.timestamp)
+        ).all()
+    finally:
+        db.close()
+    if not rows:
+        return np.array([], dtype=float)
+    timestamps, prices = zip(*rows)
+    return monthly_prices(timestamps, prices)
+
+def store_predictions(commodity_id: int, predictions: List[dict], target_dates: List[datetime]):
+    """persist_predictions in a session of its own"""
+    db = SessionLocal()
+    try:
+        persist_predictions(db, commodity_id, predictions, target_dates)
+    finally:
+        db.close()
+
+async def generate_predictions(commodity_id: int, model_name: str, prediction_horizon: int) -> List[dict]:
+    """
+    Forecast the next N months from the commodity's price history with the
+    trained models and store the runs. Predictions go through the model
+    manager's micro-batching dispatcher, so concurrent requests for the same
+    model share one model call. The blocking reads and writes run in the ML
+    executor, each in a session of its own: the computation is shared by
+    every coalesced caller and may outlive the request that started it.
+    """
+    logger.info(f"Creating prediction for {commodity_id} using {model_name}")
+    logger.info(f"Parameters: commodity_id={commodity_id}, model_name={model_name}, prediction_horizon={prediction_horizon}")
+    loop = asyncio.get_running_loop()
+
+    future_dates = forecast_dates(prediction_horizon)
+    with span("fetch"):
+        prices = await loop.run_in_executor(ml_executor, in_profile(load_price_history), commodity_id)
+
+    async def predict(model):
+        with span(f"predict_{model}"):
+            forecast = await model_manager.predict_async(model, prices, prediction_horizon, commodity_id)
+        return forecast_rows(commodity_id, model, forecast, future_dates)
+
+    models = selected_models(model_name)
+    predictions = [row for rows in await asyncio.gather(*map(predict, models)) for row in rows]
+    number_predictions(predictions)
+
+    logger.info(f"Generated {len(predictions)} predictions")
+    with span("persist"):
+        await loop.run_in_executor(
+            ml_executor, in_profile(store_predictions), commodity_id, predictions, future_dates
+        )
+    return predictions
+
+def persist_predictions(db: Session, commodity_id: int, predictions: List[dict], target_dates: List[datetime]):
+    """Store each model's forecast run with one bulk insert per model"""
+    prediction_date = datetime.utcnow()
+    for model in {p["model_name"] for p in predictions}:
+        try:
+            model_id = get_model_id(db, model)
+            if model_id is None:
+                logger.warning(f"No registered model for {model}; forecast not stored")
+                continue
+            rows = [p for p in predictions if p["model_name"] == model]
+            save_prediction(
+                db,
+                commodity_id=commodity_id,
+                model_id=model_id,
+                predictions=[p["value"] for p in rows],
+                target_dates=target_dates[:len(rows)],
+                confidence_lower=[p["confidence_lower"] for p in rows],
+                confidence_upper=[p["confidence_upper"] for p in rows],
+                prediction_date=prediction_date
+            )
+        except Exception as e:
+            logger.warning(f"Could not store {model} forecast for {commodity_id}: {str(e)}")
+
+def load_precomputed_run(db: Session, commodity_id: int, model_id: int, horizon: int, since: datetime) -> List[Prediction]:
+    """First `horizon` steps of the newest precomputed run, or [] if there is none"""
+    latest_run = db.query(func.max(Prediction.prediction_date))\
+        .filter(
+            Prediction.commodity_id == commodity_id,
+            Prediction.model_id == model_id,
+            Prediction.run_type == "precomputed",
+            Prediction.prediction_date >= since
+        )\
+        .scalar()
+    if latest_run is None:
+        return []
+
+    return db.query(Prediction)\
+        .filter(
+            Prediction.commodity_id == commodity_id,
+            Prediction.model_id == model_id,
+            Prediction.prediction_date == latest_run,
+            Prediction.horizon <= horizon
+        )\
+        .order_by(Prediction.horizon)\
+        .all()
+
+def load_precomputed_predictions(db: Session, commodity_id: int, model_name: str, prediction_horizon: int) -> Optional[List[dict]]:
+    """
+    Serve a standard-horizon request from the precomputed forecasts.
+    Returns None when the horizon is not standard or any model's run is
+    missing or stale, so the caller computes on demand instead.
+    """
+    models = selected_models(model_name)
+    if prediction_horizon not in STANDARD_HORIZONS or not models:
+        return None
+
+    since = datetime.utcnow() - timedelta(hours=PRECOMPUTED_MAX_AGE_HOURS)
+    predictions = []
+    for model in models:
+        model_id = get_model_id(db, model)
+        if model_id is None:
+            return None
+        rows = load_precomputed_run(db, commodity_id, model_id, prediction_horizon, since)
+        if len(rows) < prediction_horizon:
+            return None
+        predictions.extend({
+            "commodity_id": str(commodity_id),
+            "value": row.predicted_price,
+            "prediction_date": row.target_date.strftime('%Y-%m-%d'),
+            "model_name": model,
+            "days_ahead": row.horizon,
+            "confidence_lower": row.confidence_lower,
+            "confidence_upper": row.confidence_upper
+        } for row in rows)
+    return number_predictions(predictions)
@@ -1,10 +1,13 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from sqlalchemy.orm import Session
 from .database import engine, Base, SessionLocal
-from .models.commodity import Commodity, Price, Model, Prediction
+from .models.commodity import Commodity, Model, Prediction
 import random
 import math
 from .data_loader import load_csv_data
+from .synthetic import SEED_PROFILES, generate_price_frames, price_dates
+from .utils import insert_price_frame
+from .jobs.precompute_forecasts import run_precompute_forecasts
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,6 +26,12 @@ def init_db():
             logger.info("Loaded CSV data successfully")
         finally:
             db.close()
+
+        # Refresh the precomputed forecasts for the newly ingested prices
+        try:
+            run_precompute_forecasts()
+        except Exception as e:
+            logger.warning(f"Could not precompute forecasts after ingestion: {str(e)}")
             
     except Exception as e:
         logger.error(f"Error initializing database: {str(e)}")
@@ -92,71 +101,19 @@ def seed_data(db: Session):
             db.add(commodity)
         db.commit()
         
-        # Generate historical price data only if no CSV data was loaded
-        # Current market prices in INR (as of 2024)
-        base_prices = {
-            "Wheat": 2600,     # INR per quintal
-            "Rice": 4200,      # INR per quintal
-            "Corn": 2100,      # INR per quintal
-            "Soybean": 4800,   # INR per quintal
-            "Cotton": 6500,    # INR per quintal
-            "Sugarcane": 315,  # INR per quintal
-            "Groundnut": 5800, # INR per quintal
-            "Mustard": 5200    # INR per quintal
-        }
-        
-        # Seasonal patterns for each commodity (peak months)
-        seasonal_peaks = {
-            "Wheat": [3, 4],      # March-April
-            "Rice": [9, 10],      # September-October
-            "Corn": [8, 9],       # August-September
-            "Soybean": [10, 11],  # October-November
-            "Cotton": [11, 12],   # November-December
-            "Sugarcane": [1, 2],  # January-February
-            "Groundnut": [10, 11], # October-November
-            "Mustard": [2, 3]     # February-March
-        }
-        
-        # Add historical prices (last 60 days with realistic variations)
-        for commodity in commodities:
-            base_price = base_prices[commodity.name]
-            trend = random.uniform(-0.1, 0.1)  # Overall trend
-            
-            # Generate 60 days of historical data
-            for days_ago in range(60):
-                date = datetime.utcnow() - timedelta(days=days_ago)
-                current_month = date.month
-                
-                # Calculate seasonal effect
-                peak_months = seasonal_peaks[commodity.name]
-                seasonal_factor = 1.0
-                if current_month in peak_months:
-                    seasonal_factor = 1.15  # 15% higher in peak season
-                elif (current_month - 1) in peak_months or (current_month + 1) in peak_months:
-                    seasonal_factor = 1.08  # 8% higher in adjacent months
-                
-                # Add trend effect
-                trend_factor = 1 + trend * days_ago / 60
-                
-                # Add random daily variation
-                random_factor = random.uniform(0.98, 1.02)
-                
-                # Calculate final price with all factors
-                price_variation = base_price * seasonal_factor * trend_factor * random_factor
-                
-                # Add some volatility based on day of week (higher on weekdays)
-                if date.weekday() < 5:  # Monday to Friday
-                    price_variation *= random.uniform(1.01, 1.03)
-                
-                db.add(Price(
-                    commodity_id=commodity.id,
-                    price=round(price_variation, 2),
-                    currency="INR",
-                    timestamp=date,
-                    source="historical_data",
-                    volume=random.randint(100, 1000)  # Daily trading volume
-                ))
-        db.commit()
+        # Generate historical price data only if no CSV data was loaded: five
+        # years of daily prices with seasonal, trend and weekday effects, which
+        # gives the models the 60 monthly observations they forecast from
+        profiles = {profile.name: profile for profile in SEED_PROFILES}
+        frame = next(generate_price_frames(
+            [commodity.id for commodity in commodities],
+            [profiles[commodity.name] for commodity in commodities],
+            price_dates(5 * 365 + 31),
+            seed=random.randrange(2**32),
+            chunk_commodities=len(commodities),
+            source="historical_data"
+        ))
+        insert_price_frame(db, frame)
 
     # Add ML models with detailed descriptions (always add these)
     # First, check if models already exist to avoid duplicates
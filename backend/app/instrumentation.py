@@ -0,0 +1,166 @@
+"""
+Hot-path instrumentation: request latency per route, database queries per
+request, model timings and connection pool waits, exposed at /metrics.
+"""
+import contextvars
+import functools
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .metrics import registry
+
+# Clients allowed to scrape /metrics (local-only by default)
+METRICS_ALLOWED_HOSTS = {
+    host.strip() for host in os.getenv("METRICS_ALLOWED_HOSTS", "127.0.0.1,::1,localhost").split(",") if host.strip()
+}
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+request_latency = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+request_queries = registry.histogram(
+    "http_request_db_queries", "Database queries issued per HTTP request", ("route",), QUERY_COUNT_BUCKETS
+)
+request_db_time = registry.histogram(
+    "http_request_db_seconds", "Time spent in database queries per HTTP request", ("route",)
+)
+query_latency = registry.histogram(
+    "db_query_duration_seconds", "Database query latency by statement type", ("statement",)
+)
+pool_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+pool_timeouts = registry.counter(
+    "db_pool_checkout_timeouts_total", "Connection checkouts that failed or timed out"
+)
+model_latency = registry.histogram(
+    "model_operation_duration_seconds", "Model fit and inference time", ("model", "commodity", "operation"),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+)
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+
+# Stats of the request being served. Threads see it only when the context is copied to them:
+# Starlette's threadpool and ml_executor do, a bare loop.run_in_executor does not
+current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("current_request", default=None)
+
+def model_timer(model: str, operation: str, commodity=None):
+    """Context manager timing one model fit/inference call"""
+    return model_latency.time(model=model, commodity=commodity if commodity is not None else "", operation=operation)
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and query counts per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_request.reset(token)
+            # The router stores the matched route in the scope; unmatched paths share one label
+            route = scope.get("route")
+            route = getattr(route, "path", None) or "unmatched"
+            request_latency.observe(elapsed, method=scope["method"], route=route, status=status["code"])
+            request_queries.observe(stats.queries, route=route)
+            request_db_time.observe(stats.db_seconds, route=route)
+
+def instrument_engine(engine: Engine):
+    """Time queries and pool checkouts of an engine"""
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        query_latency.observe(elapsed, statement=statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "")
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # Drop the start time of a failed statement
+        if context.connection is not None and context.connection.info.get("query_start"):
+            context.connection.info["query_start"].pop()
+
+    instrument_pool(engine.pool)
+
+def instrument_pool(pool):
+    """
+    Time how long checkouts wait for a connection. SQLAlchemy has no
+    pre-checkout event, so the pool's internal getter is wrapped.
+    """
+    do_get = pool._do_get
+
+    @functools.wraps(do_get)
+    def timed_do_get():
+        start = time.perf_counter()
+        try:
+            return do_get()
+        except Exception:
+            pool_timeouts.inc()
+            raise
+        finally:
+            pool_wait.observe(time.perf_counter() - start)
+
+    pool._do_get = timed_do_get
+
+# Engines whose pool state is reported, by name
+monitored_engines = {}
+
+def read_pool_state():
+    values = {}
+    for name, engine in list(monitored_engines.items()):
+        pool = engine.pool
+        for stat in ("size", "checkedout", "checkedin", "overflow"):
+            getter = getattr(pool, stat, None)
+            if callable(getter):
+                values[(name, stat)] = getter()
+    return values
+
+registry.gauge("db_pool_connections", "Connection pool state", ("engine", "state"), read_pool_state)
+
+def register_pool_gauges(name: str, engine: Engine):
+    """Report the pool size and usage of an engine, read at scrape time"""
+    monitored_engines[name] = engine
+
+router = APIRouter()
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus scrape endpoint, only served to local clients"""
+    client = request.client.host if request.client else None
+    if client not in METRICS_ALLOWED_HOSTS:
+        raise HTTPException(status_code=403, detail="Metrics are only available locally")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,199 @@
+"""
+Score stored forecasts against realized prices.
+
+Predictions whose target_date has passed and whose accuracy is still NULL
+are joined with the prices table on (commodity_id, day). Each matched row
+gets its own accuracy, and the errors are folded into running sums in
+forecast_accuracy per model/commodity/horizon, so every run only touches
+newly realized targets. Targets without a realized price are retried for
+ACCURACY_BACKFILL_GRACE_DAYS and then left unscored, so gaps in the price
+feed are not re-read on every run forever.
+
+Run once from the backend directory:
+    python -m app.jobs.accuracy_backfill
+"""
+from datetime import datetime, timedelta
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models.commodity import ForecastAccuracy, Model, Prediction, Price
+
+logger = logging.getLogger(__name__)
+
+# Seconds between scheduled runs; 0 disables the scheduler
+BACKFILL_INTERVAL = float(os.getenv("ACCURACY_BACKFILL_INTERVAL", "3600"))
+# Days a realized target waits for its price before it is no longer scored
+BACKFILL_GRACE_DAYS = float(os.getenv("ACCURACY_BACKFILL_GRACE_DAYS", "30"))
+
+GROUP_KEYS = ["model_id", "commodity_id", "horizon"]
+
+def unscored_predictions_query(now: datetime):
+    """Predictions whose target date passed within the grace period and which have not been scored yet"""
+    table = Prediction.__table__
+    return select(
+        table.c.id,
+        table.c.model_id,
+        table.c.commodity_id,
+        table.c.horizon,
+        table.c.predicted_price,
+        table.c.target_date,
+    ).where(
+        table.c.accuracy.is_(None),
+        table.c.target_date <= now,
+        table.c.target_date > now - timedelta(days=BACKFILL_GRACE_DAYS),
+    )
+
+def load_unscored_predictions(db: Session, now: datetime) -> pd.DataFrame:
+    return pd.read_sql(unscored_predictions_query(now), db.connection(), parse_dates=["target_date"])
+
+def load_realized_prices(db: Session, commodity_ids, start: datetime, end: datetime) -> pd.DataFrame:
+    """Prices for the given commodities inside the target date window"""
+    table = Price.__table__
+    stmt = select(
+        table.c.commodity_id,
+        table.c.price,
+        table.c.timestamp,
+    ).where(
+        table.c.commodity_id.in_(list(commodity_ids)),
+        table.c.timestamp >= start,
+        table.c.timestamp < end,
+    )
+    return pd.read_sql(stmt, db.connection(), parse_dates=["timestamp"])
+
+def score_predictions(predictions: pd.DataFrame, prices: pd.DataFrame) -> pd.DataFrame:
+    """Join predictions with the realized price of their target day and compute errors"""
+    prices = prices.assign(day=prices["timestamp"].dt.normalize())
+    # Keep the last observation of each day
+    prices = prices.sort_values("timestamp").drop_duplicates(["commodity_id", "day"], keep="last")
+
+    scored = predictions.assign(day=predictions["target_date"].dt.normalize()).merge(
+        prices[["commodity_id", "day", "price"]], on=["commodity_id", "day"], how="inner"
+    )
+    scored = scored[scored["price"] > 0]
+
+    error = scored["predicted_price"].to_numpy() - scored["price"].to_numpy()
+    abs_error = np.abs(error)
+    abs_pct_error = abs_error / scored["price"].to_numpy()
+    return scored.assign(
+        horizon=scored["horizon"].fillna(0).astype(int),
+        abs_error=abs_error,
+        abs_pct_error=abs_pct_error,
+        sq_error=error ** 2,
+        accuracy=np.clip(1.0 - abs_pct_error, 0.0, 1.0),
+    )
+
+def store_prediction_accuracy(db: Session, scored: pd.DataFrame):
+    """Write per-prediction accuracy with a single executemany update"""
+    table = Prediction.__table__
+    stmt = update(table)\
+        .where(table.c.id == bindparam("prediction_id"))\
+        .values(accuracy=bindparam("prediction_accuracy"))
+    db.execute(stmt, [
+        {"prediction_id": int(pid), "prediction_accuracy": float(acc)}
+        for pid, acc in zip(scored["id"].to_numpy(), scored["accuracy"].to_numpy())
+    ])
+
+def merge_accuracy_totals(db: Session, scored: pd.DataFrame) -> int:
+    """Fold the new errors into the running totals per model/commodity/horizon"""
+    batch = scored.groupby(GROUP_KEYS).agg(
+        count=("abs_error", "size"),
+        sum_abs_error=("abs_error", "sum"),
+        sum_abs_pct_error=("abs_pct_error", "sum"),
+        sum_sq_error=("sq_error", "sum"),
+    ).reset_index()
+
+    existing = {
+        (row.model_id, row.commodity_id, row.horizon): row
+        for row in db.query(ForecastAccuracy)
+        .filter(ForecastAccuracy.model_id.in_(batch["model_id"].unique().tolist()))
+        .all()
+    }
+
+    for group in batch.to_dict("records"):
+        key = (group["model_id"], group["commodity_id"], group["horizon"])
+        row = existing.get(key)
+        if row is None:
+            row = ForecastAccuracy(
+                model_id=group["model_id"],
+                commodity_id=group["commodity_id"],
+                horizon=group["horizon"],
+                count=0,
+                sum_abs_error=0.0,
+                sum_abs_pct_error=0.0,
+                sum_sq_error=0.0
+            )
+            db.add(row)
+        row.count += int(group["count"])
+        row.sum_abs_error += float(group["sum_abs_error"])
+        row.sum_abs_pct_error += float(group["sum_abs_pct_error"])
+        row.sum_sq_error += float(group["sum_sq_error"])
+        row.mae = row.sum_abs_error / row.count
+        row.mape = row.sum_abs_pct_error / row.count
+        row.rmse = float(np.sqrt(row.sum_sq_error / row.count))
+    db.flush()
+    return len(batch)
+
+def refresh_model_accuracy(db: Session, model_ids):
+    """Set Model.accuracy to 1 - MAPE over everything scored so far"""
+    totals = db.query(
+        ForecastAccuracy.model_id,
+        func.sum(ForecastAccuracy.sum_abs_pct_error),
+        func.sum(ForecastAccuracy.count)
+    ).filter(ForecastAccuracy.model_id.in_(model_ids))\
+        .group_by(ForecastAccuracy.model_id)\
+        .all()
+
+    for model_id, sum_abs_pct_error, count in totals:
+        if count:
+            db.query(Model).filter(Model.id == model_id).update(
+                {"accuracy": max(0.0, 1.0 - sum_abs_pct_error / count)},
+                synchronize_session=False
+            )
+
+def backfill_accuracy(db: Session, now: datetime = None) -> dict:
+    """Score newly realized predictions and update the precomputed metrics"""
+    now = now or datetime.utcnow()
+    try:
+        predictions = load_unscored_predictions(db, now)
+        if predictions.empty:
+            logger.info("No newly realized predictions to score")
+            return {"scored": 0, "groups": 0}
+
+        start = predictions["target_date"].min().normalize()
+        end = predictions["target_date"].max().normalize() + timedelta(days=1)
+        prices = load_realized_prices(db, predictions["commodity_id"].unique().tolist(), start, end)
+
+        scored = score_predictions(predictions, prices)
+        if scored.empty:
+            logger.info(f"{len(predictions)} predictions pending, none have realized prices yet")
+            return {"scored": 0, "groups": 0}
+
+        store_prediction_accuracy(db, scored)
+        groups = merge_accuracy_totals(db, scored)
+        refresh_model_accuracy(db, scored["model_id"].unique().tolist())
+        db.commit()
+
+        logger.info(f"Scored {len(scored)} predictions across {groups} model/commodity/horizon groups")
+        return {"scored": len(scored), "groups": groups}
+    except Exception as e:
+        logger.error(f"Error in accuracy backfill: {str(e)}")
+        db.rollback()
+        raise
+
+def run_accuracy_backfill() -> dict:
+    """Entry point for the scheduler: run the backfill in its own session"""
+    db = SessionLocal()
+    try:
+        return backfill_accuracy(db)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(run_accuracy_backfill())
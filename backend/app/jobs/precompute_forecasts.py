@@ -0,0 +1,167 @@
+"""
+Precompute forecasts for every commodity x model at the standard horizons.
+
+Each commodity's price history, resampled to monthly means, is forecast by
+the trained models (a model that has not been trained yet is trained on the
+first series it sees).
+One run per commodity/model is computed for the longest standard horizon;
+shorter standard horizons are served from its first steps, since each
+step of a forecast does not depend on how many steps follow it. All runs
+of a pass are computed in parallel and written with one bulk insert.
+
+Runs older than PRECOMPUTED_RETENTION_DAYS are thinned to the first run of
+each month: those keep being scored by the accuracy backfill, the rest
+were superseded by newer runs and are deleted.
+
+Run once from the backend directory:
+    python -m app.jobs.precompute_forecasts
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+import logging
+import os
+
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..cpu_budget import cpu_budget
+from ..database import SessionLocal
+from ..events import publish_forecasts
+from ..forecasting import MODEL_SELECTIONS, STANDARD_HORIZONS, forecast_dates, monthly_prices
+from ..ml_models.model_manager import model_manager
+from ..models.commodity import Prediction, Price
+from ..utils import build_prediction_records, get_model_id, insert_prediction_records
+
+logger = logging.getLogger(__name__)
+
+# Seconds between scheduled runs (nightly by default); 0 disables the scheduler
+PRECOMPUTE_INTERVAL = float(os.getenv("PRECOMPUTE_INTERVAL", "86400"))
+PRECOMPUTE_WORKERS = int(os.getenv("PRECOMPUTE_WORKERS", str(cpu_budget.ml_workers)))
+# Every precomputed run is kept this long; older ones only once per month
+PRECOMPUTED_RETENTION_DAYS = float(os.getenv("PRECOMPUTED_RETENTION_DAYS", "7"))
+
+def load_price_series(db: Session) -> dict:
+    """Monthly price history per commodity id, oldest first, with one query"""
+    table = Price.__table__
+    rows = db.execute(
+        select(table.c.commodity_id, table.c.timestamp, table.c.price)
+        .order_by(table.c.commodity_id, table.c.timestamp)
+    ).all()
+    if not rows:
+        return {}
+    frame = pd.DataFrame(rows, columns=["commodity_id", "timestamp", "price"])
+    return {
+        int(commodity_id): monthly_prices(group["timestamp"], group["price"])
+        for commodity_id, group in frame.groupby("commodity_id", sort=True)
+    }
+
+def prune_precomputed_runs(db: Session, now: datetime) -> int:
+    """Delete superseded runs past the retention period except the first of each month"""
+    cutoff = now - timedelta(days=PRECOMPUTED_RETENTION_DAYS)
+    run_dates = [
+        run_date for run_date, in db.query(Prediction.prediction_date)
+        .filter(Prediction.run_type == "precomputed", Prediction.prediction_date < cutoff)
+        .distinct()
+        .order_by(Prediction.prediction_date)
+        .all()
+    ]
+    keep = {}
+    for run_date in run_dates:
+        keep.setdefault((run_date.year, run_date.month), run_date)
+    expired = [run_date for run_date in run_dates if run_date not in set(keep.values())]
+    if not expired:
+        return 0
+
+    deleted = db.query(Prediction)\
+        .filter(Prediction.run_type == "precomputed", Prediction.prediction_date.in_(expired))\
+        .delete(synchronize_session=False)
+    db.commit()
+    logger.info(f"Pruned {len(expired)} superseded precomputed runs ({deleted} rows)")
+    return deleted
+
+def precompute_forecasts(db: Session, horizons=None) -> dict:
+    """Compute and store one precomputed run per commodity and model"""
+    horizons = horizons or STANDARD_HORIZONS
+    max_horizon = max(horizons)
+    try:
+        models = sorted({model for names in MODEL_SELECTIONS.values() for model in names})
+        model_ids = {model: get_model_id(db, model) for model in models}
+        missing = [model for model, model_id in model_ids.items() if model_id is None]
+        if missing:
+            logger.warning(f"No registered model for {missing}; skipping them")
+        model_ids = {model: model_id for model, model_id in model_ids.items() if model_id is not None}
+
+        series = load_price_series(db)
+        short = [commodity_id for commodity_id, prices in series.items() if len(prices) < model_manager.min_prices]
+        if short:
+            logger.warning(f"Fewer than {model_manager.min_prices} prices for commodities {short}; skipping them")
+        future_dates = forecast_dates(max_horizon)
+
+        def forecast(task):
+            commodity_id, model = task
+            return model_manager.predict(model, series[commodity_id], max_horizon, commodity_id)
+
+        tasks = [
+            (commodity_id, model)
+            for commodity_id, prices in series.items() if len(prices) >= model_manager.min_prices
+            for model in model_ids
+        ]
+        # One failing commodity must not cost the whole pass its results
+        runs = {}
+        failed = []
+        with ThreadPoolExecutor(max_workers=PRECOMPUTE_WORKERS) as pool:
+            futures = {pool.submit(forecast, task): task for task in tasks}
+            for future in as_completed(futures):
+                commodity_id, model = futures[future]
+                try:
+                    runs[(commodity_id, model)] = future.result()
+                except Exception as e:
+                    failed.append((commodity_id, model))
+                    logger.error(f"Could not precompute {model} forecast for commodity {commodity_id}: {str(e)}")
+
+        prediction_date = datetime.utcnow()
+        records = []
+        for (commodity_id, model), run in sorted(runs.items()):
+            records.extend(build_prediction_records(
+                commodity_id,
+                model_ids[model],
+                predictions=run["predictions"],
+                target_dates=future_dates,
+                confidence_lower=[bounds["lower"] for bounds in run["confidence"]],
+                confidence_upper=[bounds["upper"] for bounds in run["confidence"]],
+                prediction_date=prediction_date,
+                run_type="precomputed"
+            ))
+        insert_prediction_records(db, records)
+        # Push the refreshed runs to live dashboards
+        publish_forecasts(records, {model_id: model for model, model_id in model_ids.items()})
+        pruned = prune_precomputed_runs(db, prediction_date)
+
+        logger.info(
+            f"Precomputed {len(runs)} forecast runs ({len(records)} rows) up to {max_horizon} months"
+            + (f", {len(failed)} failed" if failed else "")
+        )
+        return {
+            "runs": len(runs),
+            "failed": len(failed),
+            "rows": len(records),
+            "pruned_rows": pruned,
+            "prediction_date": prediction_date
+        }
+    except Exception as e:
+        logger.error(f"Error precomputing forecasts: {str(e)}")
+        db.rollback()
+        raise
+
+def run_precompute_forecasts() -> dict:
+    """Entry point for the scheduler and ingestion hook: run in its own session"""
+    db = SessionLocal()
+    try:
+        return precompute_forecasts(db)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(run_precompute_forecasts())
@@ -0,0 +1,69 @@
+import asyncio
+import logging
+import os
+import tempfile
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# In-app scheduling of the periodic jobs; serve.py turns it off by default
+SCHEDULED_JOBS = os.getenv("SCHEDULED_JOBS", "true").lower() == "true"
+# Only the process holding this lock runs the jobs, so several workers never run them twice
+SCHEDULER_LOCK_FILE = os.getenv(
+    "SCHEDULER_LOCK_FILE", os.path.join(tempfile.gettempdir(), "commodity-api-scheduler.lock")
+)
+
+# Kept open for the life of the process: closing it releases the lock
+_lock_file = None
+
+def acquire_scheduler_lock() -> bool:
+    """Try to become the process that runs the scheduled jobs"""
+    global _lock_file
+    if _lock_file is not None:
+        return True
+    try:
+        import fcntl
+    except ImportError:
+        # No flock (Windows): a single process is assumed
+        return True
+    lock_file = open(SCHEDULER_LOCK_FILE, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _lock_file = lock_file
+    return True
+
+async def run_periodically(job: Callable[[], object], interval_seconds: float, name: str):
+    """Run a blocking job in the default executor every `interval_seconds`"""
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            await loop.run_in_executor(None, job)
+        except Exception as e:
+            logger.error(f"Scheduled job {name} failed: {str(e)}")
+        await asyncio.sleep(interval_seconds)
+
+def schedule(job: Callable[[], object], interval_seconds: float, name: str) -> Optional[asyncio.Task]:
+    """Start a periodic job on the running event loop; an interval <= 0 disables it"""
+    if interval_seconds <= 0:
+        logger.info(f"Scheduled job {name} disabled")
+        return None
+    logger.info(f"Scheduling job {name} every {interval_seconds}s")
+    return asyncio.get_running_loop().create_task(
+        run_periodically(job, interval_seconds, name)
+    )
+
+def start_scheduled_jobs(jobs) -> list:
+    """
+    Schedule (job, interval_seconds, name) entries in this process, unless
+    scheduling is off or another process on this host already runs them
+    """
+    if not SCHEDULED_JOBS:
+        logger.info("In-app scheduling is off; run the jobs with `python -m app.jobs.<job>`")
+        return []
+    if not acquire_scheduler_lock():
+        logger.info(f"Scheduled jobs run in another process ({SCHEDULER_LOCK_FILE} is locked)")
+        return []
+    return [task for task in (schedule(*job) for job in jobs) if task is not None]
@@ -35,20 +35,32 @@ class ARIMAPredictor:
             logger.error(f"Error in determine_order: {str(e)}")
             return (1, 1, 1)  # fallback to default order
 
-    def train(self, prices):
+    def get_warm_start(self):
+        """State that can seed the next train() call (order and fitted parameters)"""
+        if self.model_fit is None:
+            return None
+        return {'order': self.order, 'params': np.asarray(self.model_fit.params)}
+
+    def train(self, prices, warm_start=None):
         try:
             if len(prices) < self.min_training_samples:
                 raise ValueError(f"Need at least {self.min_training_samples} data points for training")
 
             logger.info("Converting prices to time series...")
-            self.prices = np.array(prices)
+            self.prices = np.asarray(prices, dtype=float)
             
-            # Determine optimal order
-            self.order = self.determine_order(self.prices)
+            start_params = None
+            if warm_start is not None:
+                # Keep the previous order so its parameters are valid start values
+                self.order = warm_start['order']
+                start_params = warm_start['params']
+            else:
+                # Determine optimal order
+                self.order = self.determine_order(self.prices)
             
             logger.info("Fitting ARIMA model...")
             self.model = ARIMA(self.prices, order=self.order)
-            self.model_fit = self.model.fit()
+            self.model_fit = self.model.fit(start_params=start_params)
             
             # Save the model
             with open(self.model_path, 'wb') as f:
@@ -63,51 +75,94 @@ class ARIMAPredictor:
             logger.error(f"Error in train: {str(e)}")
             raise
 
+    def load(self):
+        """Load the saved fit if the model has not been trained in this process"""
+        if self.model_fit is None:
+            if os.path.exists(self.model_path):
+                logger.info("Loading saved model...")
+                with open(self.model_path, 'rb') as f:
+                    saved_model = pickle.load(f)
+                    self.model_fit = saved_model['model_fit']
+                    self.order = saved_model['order']
+            else:
+                raise ValueError("Model needs to be trained first")
+
+    def forecast(self, days_ahead, prices=None):
+        """
+        Point forecast and confidence bounds for the next `days_ahead` steps
+        after `prices`. The fitted parameters are applied to that series
+        without re-estimating them; without prices the training series is used.
+        Other commodities trade at other price levels, so the series is scaled
+        to the training series' mean first (the fitted constant and variance
+        belong to that level) and the forecast is scaled back.
+        """
+        results = self.model_fit
+        scale = 1.0
+        if prices is not None:
+            prices = np.asarray(prices, dtype=float)
+            level = prices.mean()
+            if level > 0:
+                scale = np.mean(self.model_fit.model.endog) / level
+            results = results.apply(prices * scale)
+        forecast_conf = results.get_forecast(days_ahead)
+        predictions = np.asarray(forecast_conf.predicted_mean) / scale
+        conf_int = np.asarray(forecast_conf.conf_int()) / scale
+        return predictions, conf_int
+
+    def format_forecast(self, predictions, conf_int):
+        """Build the prediction payload from forecast arrays"""
+        days_ahead = len(predictions)
+        # Generate dates
+        dates = [(datetime.now() + timedelta(days=i)).strftime('%Y-%m-%d') 
+                for i in range(1, days_ahead + 1)]
+
+        lower = np.maximum(conf_int[:, 0], 0)  # Ensure non-negative
+        confidence = [
+            {'lower': low, 'upper': high}
+            for low, high in zip(lower.tolist(), conf_int[:, 1].tolist())
+        ]
+
+        return {
+            'dates': dates,
+            'predictions': predictions.tolist(),
+            'confidence': confidence,
+            'model_info': {
+                'order': self.order,
+                'aic': self.model_fit.aic
+            }
+        }
+
     def predict(self, prices, days_ahead):
         try:
-            if self.model_fit is None:
-                if os.path.exists(self.model_path):
-                    logger.info("Loading saved model...")
-                    with open(self.model_path, 'rb') as f:
-                        saved_model = pickle.load(f)
-                        self.model_fit = saved_model['model_fit']
-                        self.order = saved_model['order']
-                else:
-                    raise ValueError("Model needs to be trained first")
+            self.load()
 
             if len(prices) < self.min_training_samples:
                 raise ValueError(f"Need at least {self.min_training_samples} prices for prediction")
 
             logger.info(f"Making predictions for {days_ahead} days...")
-            # Make predictions
-            forecast = self.model_fit.forecast(steps=days_ahead)
-            predictions = forecast.values
-
-            # Generate dates
-            dates = [(datetime.now() + timedelta(days=i)).strftime('%Y-%m-%d') 
-                    for i in range(1, days_ahead + 1)]
-
-            # Calculate confidence intervals
-            forecast_conf = self.model_fit.get_forecast(days_ahead)
-            conf_int = forecast_conf.conf_int()
-            
-            confidence = []
-            for lower, upper in conf_int:
-                confidence.append({
-                    'lower': float(max(0, lower)),  # Ensure non-negative
-                    'upper': float(upper)
-                })
+            predictions, conf_int = self.forecast(days_ahead, prices)
 
             logger.info("Predictions generated successfully")
-            return {
-                'dates': dates,
-                'predictions': predictions.tolist(),
-                'confidence': confidence,
-                'model_info': {
-                    'order': self.order,
-                    'aic': self.model_fit.aic
-                }
-            }
+            return self.format_forecast(predictions, conf_int)
         except Exception as e:
             logger.error(f"Error in predict: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+
+    def predict_batch(self, prices_list, days_ahead_list):
+        """
+        Predictions for several requests at once. The fitted parameters are
+        shared, but each request is forecast from its own series. Items that
+        fail are returned as exceptions.
+        """
+        self.load()
+        results = []
+        for prices, days_ahead in zip(prices_list, days_ahead_list):
+            if len(prices) < self.min_training_samples:
+                results.append(ValueError(f"Need at least {self.min_training_samples} prices for prediction"))
+                continue
+            try:
+                predictions, conf_int = self.forecast(days_ahead, prices)
+                results.append(self.format_forecast(predictions, conf_int))
+            except Exception as e:
+                results.append(e)
+        return results
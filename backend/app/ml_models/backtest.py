@@ -0,0 +1,253 @@
+"""
+Rolling-origin backtesting for the price predictors.
+
+Each commodity series is split into folds: the model is trained on
+everything up to the fold origin (expanding window) or on the last
+`initial_train` points (rolling window), and scored on the next
+`horizon` points. Folds run in a process pool. With warm start enabled,
+the folds of one commodity/model chain run in order inside one worker
+and each fold is seeded with the previous fold's fitted state, while
+different chains still run in parallel.
+
+Run from the backend directory:
+    python -m app.ml_models.backtest --models arima lstm --horizon 3
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..cpu_budget import cpu_budget
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Fold:
+    index: int
+    train_start: int
+    train_end: int  # exclusive; also the forecast origin
+    test_end: int   # exclusive
+
+def make_folds(
+    n_points: int,
+    initial_train: int,
+    horizon: int,
+    step: int = 1,
+    window: str = "expanding"
+) -> List[Fold]:
+    """Build rolling-origin folds over a series of `n_points`"""
+    if window not in ("expanding", "rolling"):
+        raise ValueError("window must be 'expanding' or 'rolling'")
+    if initial_train < 1 or horizon < 1 or step < 1:
+        raise ValueError("initial_train, horizon and step must be positive")
+
+    folds = []
+    origin = initial_train
+    while origin + horizon <= n_points:
+        train_start = 0 if window == "expanding" else origin - initial_train
+        folds.append(Fold(len(folds), train_start, origin, origin + horizon))
+        origin += step
+    return folds
+
+def create_predictor(model_name: str, work_dir: str):
+    """Fresh predictor whose artifacts go to a private directory"""
+    if model_name == "lstm":
+        from .lstm_model import LSTMPredictor
+        predictor = LSTMPredictor()
+        predictor.model_path = os.path.join(work_dir, "lstm_model.h5")
+        predictor.weights_path = os.path.join(work_dir, "lstm_model.npz")
+    elif model_name == "arima":
+        from .arima_model import ARIMAPredictor
+        predictor = ARIMAPredictor()
+        predictor.model_path = os.path.join(work_dir, "arima_model.pkl")
+    else:
+        raise ValueError(f"Model {model_name} not supported for backtesting")
+    return predictor
+
+def _score_fold(predictor, series: np.ndarray, fold: Fold, warm_start=None) -> Dict:
+    """Train on the fold's window, forecast its horizon and compute errors"""
+    train = series[fold.train_start:fold.train_end]
+    actual = series[fold.train_end:fold.test_end]
+
+    start = time.perf_counter()
+    predictor.train(train, warm_start=warm_start)
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = predictor.predict(train, len(actual))
+    predict_seconds = time.perf_counter() - start
+
+    forecast = np.asarray(result["predictions"], dtype=float)[:len(actual)]
+    error = forecast - actual
+    nonzero = actual != 0
+    return {
+        "fold": fold.index,
+        "train_start": fold.train_start,
+        "train_end": fold.train_end,
+        "test_end": fold.test_end,
+        "train_size": len(train),
+        "mae": float(np.mean(np.abs(error))),
+        "mape": float(np.mean(np.abs(error[nonzero]) / actual[nonzero])) if nonzero.any() else None,
+        "rmse": float(np.sqrt(np.mean(error ** 2))),
+        "fit_seconds": fit_seconds,
+        "predict_seconds": predict_seconds,
+        "warm_started": warm_start is not None,
+    }
+
+def run_folds(
+    commodity_id: str,
+    model_name: str,
+    series: np.ndarray,
+    folds: Sequence[Fold],
+    warm_start: bool = False
+) -> List[Dict]:
+    """Worker entry point: run folds of one commodity/model, in order"""
+    rows = []
+    state = None
+    with tempfile.TemporaryDirectory() as work_dir:
+        predictor = create_predictor(model_name, work_dir)
+        for fold in folds:
+            try:
+                row = _score_fold(predictor, series, fold, state if warm_start else None)
+                if warm_start:
+                    state = predictor.get_warm_start()
+            except Exception as e:
+                logger.error(f"Backtest fold {fold.index} failed for {commodity_id}/{model_name}: {str(e)}")
+                row = {"fold": fold.index, "train_end": fold.train_end, "error": str(e)}
+            rows.append({"commodity_id": commodity_id, "model_name": model_name, **row})
+    return rows
+
+def summarize(folds: pd.DataFrame) -> pd.DataFrame:
+    """Aggregate fold results into one metrics row per commodity/model"""
+    if folds.empty:
+        return folds
+    for column in ("mae", "mape", "rmse", "fit_seconds", "predict_seconds"):
+        if column not in folds:
+            folds = folds.assign(**{column: np.nan})
+    return folds.groupby(["commodity_id", "model_name"]).agg(
+        folds=("fold", "size"),
+        failed_folds=("mae", lambda s: int(s.isna().sum())),
+        mae=("mae", "mean"),
+        mape=("mape", "mean"),
+        rmse=("rmse", "mean"),
+        fit_seconds=("fit_seconds", "sum"),
+        predict_seconds=("predict_seconds", "sum"),
+    ).reset_index()
+
+def backtest_workers(max_workers: Optional[int] = None) -> int:
+    """
+    Worker processes for a backtest: the requested count capped at the CPU
+    budget's ML share, which is also the default
+    """
+    if max_workers is None:
+        return cpu_budget.ml_workers
+    if max_workers < 1:
+        raise ValueError(f"max_workers must be at least 1, got {max_workers}")
+    return min(max_workers, cpu_budget.ml_workers)
+
+def run_backtest(
+    series_by_commodity: Dict[str, np.ndarray],
+    model_names: Sequence[str] = ("arima", "lstm"),
+    initial_train: int = 36,
+    horizon: int = 3,
+    step: int = 3,
+    window: str = "expanding",
+    warm_start: bool = False,
+    max_workers: Optional[int] = None
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Backtest every model on every series.
+    Returns (summary, folds): aggregated metrics and per-fold metrics/timings.
+    """
+    workers = backtest_workers(max_workers)
+    tasks = []
+    for commodity_id, series in series_by_commodity.items():
+        series = np.asarray(series, dtype=float)
+        folds = make_folds(len(series), initial_train, horizon, step, window)
+        if not folds:
+            logger.warning(f"Series for {commodity_id} too short for backtesting ({len(series)} points)")
+            continue
+        for model_name in model_names:
+            if warm_start:
+                # One ordered chain per commodity/model so state can carry over
+                tasks.append((commodity_id, model_name.lower(), series, folds, True))
+            else:
+                tasks.extend(
+                    (commodity_id, model_name.lower(), series, [fold], False) for fold in folds
+                )
+
+    rows = []
+    if tasks:
+        # spawn keeps TensorFlow state out of forked children, which inherit
+        # the CPU budget's thread limits through the environment
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [pool.submit(run_folds, *task) for task in tasks]
+            for future in as_completed(futures):
+                rows.extend(future.result())
+
+    folds = pd.DataFrame(rows)
+    if not folds.empty:
+        folds = folds.sort_values(["commodity_id", "model_name", "fold"]).reset_index(drop=True)
+    return summarize(folds), folds
+
+def load_series(db, commodity_ids: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+    """Load price series for the requested (or all) commodities"""
+    from ..models.commodity import Commodity
+    from ..utils import get_price_data_for_commodity
+
+    query = db.query(Commodity.id)
+    if commodity_ids:
+        query = query.filter(Commodity.id.in_(list(commodity_ids)))
+    return {
+        commodity_id: get_price_data_for_commodity(db, commodity_id)
+        for commodity_id, in query.all()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the price predictors")
+    parser.add_argument("--commodities", nargs="*", help="Commodity ids (default: all)")
+    parser.add_argument("--models", nargs="+", default=["arima", "lstm"])
+    parser.add_argument("--initial-train", type=int, default=36)
+    parser.add_argument("--horizon", type=int, default=3)
+    parser.add_argument("--step", type=int, default=3)
+    parser.add_argument("--window", choices=["expanding", "rolling"], default="expanding")
+    parser.add_argument("--warm-start", action="store_true")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", help="Write per-fold results to this CSV file")
+    args = parser.parse_args()
+
+    cpu_budget.apply()
+    from ..database import SessionLocal
+    db = SessionLocal()
+    try:
+        series = load_series(db, args.commodities)
+    finally:
+        db.close()
+
+    summary, folds = run_backtest(
+        series,
+        model_names=args.models,
+        initial_train=args.initial_train,
+        horizon=args.horizon,
+        step=args.step,
+        window=args.window,
+        warm_start=args.warm_start,
+        max_workers=args.workers
+    )
+    print(summary.to_string(index=False))
+    if args.output:
+        folds.to_csv(args.output, index=False)
+        print(f"Per-fold results written to {args.output}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
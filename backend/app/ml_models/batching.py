@@ -0,0 +1,142 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Set
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PendingRequest:
+    prices: Any
+    days_ahead: int
+    future: asyncio.Future
+    enqueued: float = field(default_factory=time.perf_counter)
+
+class BatchingStats:
+    """Counters for batch sizes and queue waits, per model"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, model_name: str, batch_size: int, waits: List[float]):
+        with self._lock:
+            stats = self._models.setdefault(model_name, {
+                "requests": 0,
+                "batches": 0,
+                "max_batch_size": 0,
+                "queue_wait_seconds_sum": 0.0,
+                "queue_wait_seconds_max": 0.0,
+                "batch_size_histogram": {},
+            })
+            stats["requests"] += batch_size
+            stats["batches"] += 1
+            stats["max_batch_size"] = max(stats["max_batch_size"], batch_size)
+            stats["queue_wait_seconds_sum"] += sum(waits)
+            stats["queue_wait_seconds_max"] = max(stats["queue_wait_seconds_max"], max(waits))
+            histogram = stats["batch_size_histogram"]
+            histogram[batch_size] = histogram.get(batch_size, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            result = {}
+            for model_name, stats in self._models.items():
+                result[model_name] = {
+                    **stats,
+                    "batch_size_histogram": dict(stats["batch_size_histogram"]),
+                    "avg_batch_size": stats["requests"] / stats["batches"],
+                    "avg_queue_wait_seconds": stats["queue_wait_seconds_sum"] / stats["requests"],
+                }
+            return result
+
+class InferenceBatcher:
+    """
+    Gathers predict requests per model that arrive within `max_wait_ms`
+    (or until `max_batch_size` are queued) and runs them as one batch.
+
+    `run_batch(model_name, prices_list, days_ahead_list)` is called in
+    `executor` and must return one result per request; a result that is
+    an exception is raised to that request's caller only.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[str, List[Any], List[int]], List[Any]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        executor=None
+    ):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.executor = executor
+        self.stats = BatchingStats()
+        self._pending: Dict[str, List[PendingRequest]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        # The loop only keeps weak references to tasks; hold running batches
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, model_name: str, prices, days_ahead: int):
+        """Queue one request and wait for its result"""
+        loop = asyncio.get_running_loop()
+        request = PendingRequest(prices=prices, days_ahead=days_ahead, future=loop.create_future())
+        pending = self._pending.setdefault(model_name, [])
+        pending.append(request)
+
+        if len(pending) >= self.max_batch_size:
+            self._flush(model_name)
+        elif model_name not in self._timers:
+            self._timers[model_name] = loop.call_later(self.max_wait, self._flush, model_name)
+        return await request.future
+
+    def _flush(self, model_name: str):
+        timer = self._timers.pop(model_name, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(model_name, [])
+        if batch:
+            task = asyncio.ensure_future(self._run(model_name, batch))
+            self._tasks.add(task)
+            task.add_done_callback(functools.partial(self._finished, model_name, batch))
+
+    def _finished(self, model_name: str, batch: List[PendingRequest], task: asyncio.Task):
+        """Drop a finished batch task and release any caller it left waiting"""
+        self._tasks.discard(task)
+        error = None if task.cancelled() else task.exception()
+        if error is not None:
+            logger.error(f"Batch task for {model_name} failed: {str(error)}")
+        for request in batch:
+            if request.future.done():
+                continue
+            if error is None:
+                request.future.cancel()
+            else:
+                request.future.set_exception(error)
+
+    async def _run(self, model_name: str, batch: List[PendingRequest]):
+        started = time.perf_counter()
+        self.stats.record(model_name, len(batch), [started - r.enqueued for r in batch])
+
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self.executor,
+                self.run_batch,
+                model_name,
+                [r.prices for r in batch],
+                [r.days_ahead for r in batch]
+            )
+        except Exception as e:
+            logger.error(f"Batched inference failed for {model_name}: {str(e)}")
+            results = [e] * len(batch)
+
+        for request, result in zip(batch, results):
+            if request.future.done():
+                continue  # Caller went away
+            if isinstance(result, Exception):
+                request.future.set_exception(result)
+            else:
+                request.future.set_result(result)
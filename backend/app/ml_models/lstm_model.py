@@ -1,12 +1,14 @@
 import numpy as np
 import pandas as pd
-from tensorflow.keras.models import Sequential, load_model
-from tensorflow.keras.layers import LSTM, Dense, Dropout
-from tensorflow.keras.optimizers import Adam
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.preprocessing import MinMaxScaler
 from datetime import datetime, timedelta
 import logging
 import os
+from .numpy_lstm import NumpyLSTM, export_keras_model
+
+# TensorFlow is imported lazily so processes that only serve forecasts
+# from the exported NumPy weights never load it
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,29 +19,38 @@ class LSTMPredictor:
         self.scaler = MinMaxScaler(feature_range=(0, 1))
         self.sequence_length = 10
         self.model_path = 'lstm_model.h5'
+        self.weights_path = 'lstm_model.npz'
+        self.kernel = None  # NumpyLSTM used for inference
+        self.inference_backend = os.getenv("LSTM_INFERENCE_BACKEND", "numpy")
         self.min_training_samples = 20
+        self.epochs = 100
+        self.warm_start_epochs = 20
 
     def prepare_data(self, data):
         try:
             # Ensure data is numpy array
-            data = np.array(data).reshape(-1, 1)
+            data = np.asarray(data, dtype=float).reshape(-1, 1)
             
             # Scale the data
             scaled_data = self.scaler.fit_transform(data)
             
-            # Create sequences
-            X, y = [], []
-            for i in range(len(scaled_data) - self.sequence_length):
-                X.append(scaled_data[i:(i + self.sequence_length)])
-                y.append(scaled_data[i + self.sequence_length])
+            # Create sequences: each window holds sequence_length inputs plus the target
+            windows = sliding_window_view(scaled_data[:, 0], self.sequence_length + 1) \
+                if len(scaled_data) > self.sequence_length else np.empty((0, self.sequence_length + 1))
+            X = np.ascontiguousarray(windows[:, :self.sequence_length, None])
+            y = np.ascontiguousarray(windows[:, self.sequence_length:])
             
-            return np.array(X), np.array(y)
+            return X, y
         except Exception as e:
             logger.error(f"Error in prepare_data: {str(e)}")
             raise
 
     def build_model(self, input_shape):
         try:
+            from tensorflow.keras.models import Sequential
+            from tensorflow.keras.layers import LSTM, Dense, Dropout
+            from tensorflow.keras.optimizers import Adam
+
             model = Sequential([
                 LSTM(100, activation='relu', input_shape=input_shape, return_sequences=True),
                 Dropout(0.2),
@@ -54,7 +65,11 @@ class LSTMPredictor:
             logger.error(f"Error in build_model: {str(e)}")
             raise
 
-    def train(self, prices):
+    def get_warm_start(self):
+        """State that can seed the next train() call (the current weights)"""
+        return self.model.get_weights() if self.model is not None else None
+
+    def train(self, prices, warm_start=None):
         try:
             if len(prices) < self.min_training_samples:
                 raise ValueError(f"Need at least {self.min_training_samples} data points for training")
@@ -64,16 +79,23 @@ class LSTMPredictor:
             
             logger.info("Building and training model...")
             self.model = self.build_model((self.sequence_length, 1))
+            epochs = self.epochs
+            if warm_start is not None:
+                # Continue from previous weights; fewer epochs are needed
+                self.model.set_weights(warm_start)
+                epochs = self.warm_start_epochs
             history = self.model.fit(
                 X, y,
-                epochs=100,
+                epochs=epochs,
                 batch_size=32,
                 validation_split=0.1,
                 verbose=0
             )
             
-            # Save the model
+            # Save the model, plus the weights for TensorFlow-free inference
             self.model.save(self.model_path)
+            export_keras_model(self.model, self.weights_path)
+            self.kernel = NumpyLSTM.load(self.weights_path)
             logger.info("Model trained and saved successfully")
             
             return history.history['loss'][-1]
@@ -81,61 +103,115 @@ class LSTMPredictor:
             logger.error(f"Error in train: {str(e)}")
             raise
 
+    def load_kernel(self):
+        """Load the exported NumPy weights if they exist; returns the kernel or None"""
+        if self.kernel is None and os.path.exists(self.weights_path):
+            logger.info("Loading exported LSTM weights...")
+            self.kernel = NumpyLSTM.load(self.weights_path)
+        return self.kernel
+
+    def predict_keras(self, prices, days_ahead):
+        """Autoregressive forecast through the Keras model"""
+        if self.model is None:
+            if os.path.exists(self.model_path):
+                logger.info("Loading saved model...")
+                from tensorflow.keras.models import load_model
+                self.model = load_model(self.model_path)
+            else:
+                raise ValueError("Model needs to be trained first")
+
+        # Prepare last sequence; a local scaler keeps predict free of shared state
+        scaler = MinMaxScaler(feature_range=(0, 1))
+        last_sequence = np.asarray(prices[-self.sequence_length:], dtype=float)
+        scaled_sequence = scaler.fit_transform(last_sequence.reshape(-1, 1))
+        
+        predictions = []
+        current_sequence = scaled_sequence.copy()
+
+        for i in range(days_ahead):
+            # Reshape for prediction
+            current_sequence_reshaped = current_sequence.reshape(1, self.sequence_length, 1)
+            
+            # Get prediction
+            next_pred = self.model.predict(current_sequence_reshaped, verbose=0)
+            predictions.append(next_pred[0, 0])
+            
+            # Update sequence
+            current_sequence = np.roll(current_sequence, -1)
+            current_sequence[-1] = next_pred
+
+        # Inverse transform predictions
+        predictions = np.array(predictions).reshape(-1, 1)
+        return scaler.inverse_transform(predictions).flatten()
+
+    def format_forecast(self, prices, predictions):
+        """Build the prediction payload from forecast values"""
+        days_ahead = len(predictions)
+        # Generate dates
+        dates = [(datetime.now() + timedelta(days=i)).strftime('%Y-%m-%d') 
+                for i in range(1, days_ahead + 1)]
+        
+        # Calculate confidence intervals
+        predictions = np.asarray(predictions, dtype=float).ravel()
+        std_dev = np.std(prices) * 1.96  # 95% confidence interval
+        lower = np.maximum(predictions - std_dev, 0)  # Ensure non-negative
+        upper = predictions + std_dev
+        confidence = [
+            {'lower': low, 'upper': high}
+            for low, high in zip(lower.tolist(), upper.tolist())
+        ]
+
+        return {
+            'dates': dates,
+            'predictions': predictions.tolist(),
+            'confidence': confidence
+        }
+
     def predict(self, prices, days_ahead):
         try:
-            if self.model is None:
-                if os.path.exists(self.model_path):
-                    logger.info("Loading saved model...")
-                    self.model = load_model(self.model_path)
-                else:
-                    raise ValueError("Model needs to be trained first")
-
             if len(prices) < self.sequence_length:
                 raise ValueError(f"Need at least {self.sequence_length} prices for prediction")
 
-            # Prepare last sequence
-            last_sequence = np.array(prices[-self.sequence_length:])
-            scaled_sequence = self.scaler.fit_transform(last_sequence.reshape(-1, 1))
-            
-            predictions = []
-            current_sequence = scaled_sequence.copy()
-
             logger.info(f"Making predictions for {days_ahead} days...")
-            for i in range(days_ahead):
-                # Reshape for prediction
-                current_sequence_reshaped = current_sequence.reshape(1, self.sequence_length, 1)
-                
-                # Get prediction
-                next_pred = self.model.predict(current_sequence_reshaped, verbose=0)
-                predictions.append(next_pred[0, 0])
-                
-                # Update sequence
-                current_sequence = np.roll(current_sequence, -1)
-                current_sequence[-1] = next_pred
-
-            # Inverse transform predictions
-            predictions = np.array(predictions).reshape(-1, 1)
-            predictions = self.scaler.inverse_transform(predictions)
-
-            # Generate dates
-            dates = [(datetime.now() + timedelta(days=i)).strftime('%Y-%m-%d') 
-                    for i in range(1, days_ahead + 1)]
-            
-            # Calculate confidence intervals
-            std_dev = np.std(prices) * 1.96  # 95% confidence interval
-            confidence = []
-            for pred in predictions:
-                confidence.append({
-                    'lower': float(max(0, pred - std_dev)),  # Ensure non-negative
-                    'upper': float(pred + std_dev)
-                })
+            if self.inference_backend == "numpy" and self.load_kernel() is not None:
+                window = np.asarray(prices[-self.sequence_length:], dtype=float)
+                predictions = self.kernel.forecast(window[None, :], days_ahead)[0]
+            else:
+                predictions = self.predict_keras(prices, days_ahead)
 
             logger.info("Predictions generated successfully")
-            return {
-                'dates': dates,
-                'predictions': predictions.flatten().tolist(),
-                'confidence': confidence
-            }
+            return self.format_forecast(prices, predictions)
         except Exception as e:
             logger.error(f"Error in predict: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+
+    def predict_batch(self, prices_list, days_ahead_list):
+        """
+        Predictions for several series in one batched forward pass per step.
+        Items that fail validation are returned as exceptions.
+        """
+        results = [None] * len(prices_list)
+        valid = []
+        for index, prices in enumerate(prices_list):
+            if len(prices) < self.sequence_length:
+                results[index] = ValueError(f"Need at least {self.sequence_length} prices for prediction")
+            else:
+                valid.append(index)
+
+        if valid and self.inference_backend == "numpy" and self.load_kernel() is not None:
+            windows = np.stack([
+                np.asarray(prices_list[i][-self.sequence_length:], dtype=float) for i in valid
+            ])
+            steps = max(days_ahead_list[i] for i in valid)
+            forecasts = self.kernel.forecast(windows, steps)
+            for row, index in enumerate(valid):
+                results[index] = self.format_forecast(
+                    prices_list[index], forecasts[row, :days_ahead_list[index]]
+                )
+        else:
+            for index in valid:
+                try:
+                    results[index] = self.predict(prices_list[index], days_ahead_list[index])
+                except Exception as e:
+                    results[index] = e
+        return results
@@ -1,20 +1,116 @@
 from .lstm_model import LSTMPredictor
 from .arima_model import ARIMAPredictor
+from .batching import InferenceBatcher
+from ..executors import ml_executor
+from ..instrumentation import model_timer
+from ..profiling import in_profile, span
+import asyncio
 import logging
+import os
+import threading
 import numpy as np
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@dataclass(frozen=True)
+class ModelSnapshot:
+    """
+    A trained predictor published for inference. Snapshots are never
+    modified: training builds a new predictor and swaps in a new snapshot,
+    so readers can use the one they picked up without locking.
+    """
+    name: str
+    predictor: object
+    version: int
+    trained_at: datetime
+    training_metric: float
+
 class ModelManager:
     def __init__(self):
-        self.models = {
-            'lstm': LSTMPredictor(),
-            'arima': ARIMAPredictor()
+        self.factories = {
+            'lstm': LSTMPredictor,
+            'arima': ARIMAPredictor
         }
+        # Current predictor per model; replaced (not mutated) by training
+        self.models = {name: factory() for name, factory in self.factories.items()}
+        self.snapshots = {}
         self.trained_models = set()
+        # Writers only: serialize training per model and snapshot publication
+        self.train_locks = {name: threading.RLock() for name in self.factories}
+        self.publish_lock = threading.Lock()
         self.min_prices = 60  # Minimum number of prices needed
+        self.training_listeners = []
+        # Per-model asyncio locks so only one coroutine triggers first training
+        self.training_locks = {}
+        # Micro-batching of concurrent async predictions
+        self.batcher = InferenceBatcher(
+            self.run_batch,
+            max_batch_size=int(os.getenv("INFERENCE_BATCH_MAX_SIZE", "32")),
+            max_wait_ms=float(os.getenv("INFERENCE_BATCH_MAX_WAIT_MS", "5")),
+            executor=ml_executor
+        )
+
+    def add_training_listener(self, callback):
+        """Register a callback(model_name) run after a model finishes training"""
+        self.training_listeners.append(callback)
+
+    def notify_trained(self, model_name):
+        """Run training listeners; a failing listener never fails training"""
+        for callback in self.training_listeners:
+            try:
+                callback(model_name)
+            except Exception as e:
+                logger.warning(f"Training listener failed for {model_name}: {str(e)}")
+
+    def get_snapshot(self, model_name):
+        """Current snapshot of a model, or None if it has not been trained"""
+        return self.snapshots.get(model_name.lower())
+
+    def publish(self, model_name, predictor, training_metric):
+        """Atomically replace the served predictor of a model with a newly trained one"""
+        with self.publish_lock:
+            previous = self.snapshots.get(model_name)
+            snapshot = ModelSnapshot(
+                name=model_name,
+                predictor=predictor,
+                version=previous.version + 1 if previous else 1,
+                trained_at=datetime.now(),
+                training_metric=training_metric
+            )
+            self.models[model_name] = predictor
+            self.snapshots[model_name] = snapshot
+            self.trained_models.add(model_name)
+        return snapshot
+
+    def load_saved_models(self):
+        """
+        Publish snapshots from the artifacts saved by earlier training runs
+        (ARIMA pickle, exported LSTM weights) so the first prediction does
+        not train. Only TensorFlow-free artifacts are loaded, which keeps
+        this safe to run in a server master process before it forks.
+        Returns the names of the models loaded.
+        """
+        loaded = []
+        for model_name, factory in self.factories.items():
+            if model_name in self.trained_models:
+                continue
+            predictor = factory()
+            try:
+                if model_name == 'lstm':
+                    if predictor.inference_backend != "numpy" or predictor.load_kernel() is None:
+                        continue
+                else:
+                    predictor.load()
+            except Exception as e:
+                logger.info(f"No saved {model_name} model to preload: {str(e)}")
+                continue
+            snapshot = self.publish(model_name, predictor, training_metric=None)
+            loaded.append(model_name)
+            logger.info(f"Preloaded saved {model_name} model (version {snapshot.version})")
+        return loaded
 
     def get_model(self, model_name):
         """Get a specific model by name"""
@@ -23,88 +119,172 @@ class ModelManager:
         return self.models[model_name.lower()]
 
     def validate_input(self, prices, days_ahead):
-        """Validate input data"""
-        if not prices or len(prices) < self.min_prices:
+        """
+        Validate input data and return it as a float64 array. Arrays that
+        are already float64 are not copied. NaN entries are allowed here
+        and dropped by preprocess_prices.
+        """
+        if days_ahead < 1 or days_ahead > 365:
+            raise ValueError("Prediction horizon must be between 1 and 365 days")
+
+        if prices is None:
             raise ValueError(f"Need at least {self.min_prices} historical prices for prediction")
-        
-        if not all(isinstance(p, (int, float)) for p in prices):
+        try:
+            prices = np.asarray(prices, dtype=np.float64)
+        except (TypeError, ValueError):
             raise ValueError("All prices must be numeric")
-            
-        if any(p < 0 for p in prices):
+        if prices.ndim != 1:
+            raise ValueError("Prices must be a one-dimensional sequence")
+
+        nan_mask = np.isnan(prices)
+        if prices.size - np.count_nonzero(nan_mask) < self.min_prices:
+            raise ValueError(f"Need at least {self.min_prices} historical prices for prediction")
+
+        if np.isinf(prices).any():
+            raise ValueError("All prices must be finite")
+
+        # NaN compares False, so it never counts as negative
+        if (prices < 0).any():
             raise ValueError("All prices must be non-negative")
-            
-        if days_ahead < 1 or days_ahead > 365:
-            raise ValueError("Prediction horizon must be between 1 and 365 days")
+
+        return prices
 
     def preprocess_prices(self, prices):
-        """Preprocess price data"""
-        # Convert to numpy array
-        prices = np.array(prices)
-        
-        # Remove any NaN values
-        prices = prices[~np.isnan(prices)]
+        """Preprocess price data; returns a new float64 array"""
+        prices = np.asarray(prices, dtype=np.float64)
+
+        # Remove any NaN values (only copies when there are some)
+        nan_mask = np.isnan(prices)
+        cleaned = prices[~nan_mask] if nan_mask.any() else prices
         
         # Handle outliers (clip at 3 standard deviations)
-        mean = np.mean(prices)
-        std = np.std(prices)
-        prices = np.clip(prices, mean - 3*std, mean + 3*std)
-        
-        return prices.tolist()
+        mean = cleaned.mean()
+        std = cleaned.std()
+        lower, upper = mean - 3 * std, mean + 3 * std
+        # Clip in place if we already own a copy, otherwise allocate exactly once
+        return np.clip(cleaned, lower, upper, out=cleaned if cleaned is not prices else None)
 
-    def train_model(self, model_name, prices):
-        """Train a specific model"""
+    def train_model(self, model_name, prices, commodity_id=None):
+        """
+        Train a fresh predictor and publish it as a new snapshot. The
+        predictor currently serving requests is never modified.
+        """
         try:
             logger.info(f"Training {model_name} model...")
-            model = self.get_model(model_name)
+            model_name = model_name.lower()
+            self.get_model(model_name)
             
             # Preprocess prices
             processed_prices = self.preprocess_prices(prices)
             
-            # Train the model
-            training_metric = model.train(processed_prices)
-            self.trained_models.add(model_name.lower())
+            with self.train_locks[model_name]:
+                predictor = self.factories[model_name]()
+                with model_timer(model_name, "fit", commodity_id):
+                    training_metric = predictor.train(processed_prices)
+                snapshot = self.publish(model_name, predictor, training_metric)
+            self.notify_trained(model_name)
             
-            logger.info(f"{model_name} model trained successfully. Metric: {training_metric}")
+            logger.info(f"{model_name} model trained successfully (version {snapshot.version}). Metric: {training_metric}")
             return training_metric
         except Exception as e:
             logger.error(f"Error training {model_name} model: {str(e)}")
             raise
 
-    def predict(self, model_name, prices, days_ahead):
+    def predict(self, model_name, prices, days_ahead, commodity_id=None):
         """Make predictions using a specific model"""
         try:
-            # Validate inputs
-            self.validate_input(prices, days_ahead)
-            
-            # Preprocess prices
-            processed_prices = self.preprocess_prices(prices)
+            with span("preprocess"):
+                # Validate inputs
+                prices = self.validate_input(prices, days_ahead)
+
+                # Preprocess prices
+                processed_prices = self.preprocess_prices(prices)
             
             # Get and possibly train the model
             model_name = model_name.lower()
+            self.get_model(model_name)
             if model_name not in self.trained_models:
-                self.train_model(model_name, processed_prices)
+                with span("train"), self.train_locks[model_name]:
+                    # Another thread may have trained it while we waited
+                    if model_name not in self.trained_models:
+                        self.train_model(model_name, processed_prices, commodity_id)
             
-            # Make predictions
+            # Make predictions with the snapshot current at this moment
             logger.info(f"Making predictions with {model_name} model...")
-            model = self.get_model(model_name)
-            predictions = model.predict(processed_prices, days_ahead)
+            snapshot = self.get_snapshot(model_name)
+            with span("predict"), model_timer(model_name, "predict", commodity_id):
+                predictions = snapshot.predictor.predict(processed_prices, days_ahead)
             
-            # Add metadata to predictions
-            predictions['model_name'] = model_name
-            predictions['input_prices_count'] = len(prices)
-            predictions['prediction_generated'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            
-            return predictions
+            with span("serialize"):
+                return self.add_metadata(predictions, model_name, len(prices))
         except Exception as e:
             logger.error(f"Error in prediction: {str(e)}")
             raise
 
+    async def predict_async(self, model_name, prices, days_ahead, commodity_id=None):
+        """
+        Make predictions through the micro-batching dispatcher. Requests for
+        the same model arriving within a few milliseconds share one batched
+        model call.
+        """
+        try:
+            with span("preprocess"):
+                prices = self.validate_input(prices, days_ahead)
+                processed_prices = self.preprocess_prices(prices)
+
+            model_name = model_name.lower()
+            self.get_model(model_name)
+            if model_name not in self.trained_models:
+                # Only the first waiter trains; the others find it trained
+                async with self.training_locks.setdefault(model_name, asyncio.Lock()):
+                    if model_name not in self.trained_models:
+                        loop = asyncio.get_running_loop()
+                        with span("train"):
+                            await loop.run_in_executor(
+                                ml_executor, in_profile(self.train_model), model_name, processed_prices, commodity_id
+                            )
+
+            # Includes the wait for the batch to fill
+            with span("predict"):
+                predictions = await self.batcher.submit(model_name, processed_prices, days_ahead)
+            with span("serialize"):
+                return self.add_metadata(dict(predictions), model_name, len(prices))
+        except Exception as e:
+            logger.error(f"Error in prediction: {str(e)}")
+            raise
+
+    def run_batch(self, model_name, prices_list, days_ahead_list):
+        """Run one batch of predictions for a model (called by the batcher)"""
+        logger.info(f"Running batched {model_name} inference for {len(prices_list)} requests")
+        snapshot = self.get_snapshot(model_name)
+        # A batch mixes commodities, so it is timed without one
+        with model_timer(model_name, "predict_batch"):
+            return snapshot.predictor.predict_batch(prices_list, days_ahead_list)
+
+    def add_metadata(self, predictions, model_name, input_prices_count):
+        """Add metadata to predictions"""
+        predictions['model_name'] = model_name
+        predictions['input_prices_count'] = input_prices_count
+        predictions['prediction_generated'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        return predictions
+
+    def get_batching_stats(self):
+        """Batch size and queue wait metrics of the inference dispatcher"""
+        return {
+            'max_batch_size': self.batcher.max_batch_size,
+            'max_wait_ms': self.batcher.max_wait * 1000.0,
+            'models': self.batcher.stats.snapshot()
+        }
+
     def get_model_info(self, model_name):
         """Get information about a specific model"""
         model = self.get_model(model_name)
+        snapshot = self.get_snapshot(model_name)
         return {
             'name': model_name,
             'is_trained': model_name in self.trained_models,
+            'version': snapshot.version if snapshot else None,
+            'last_trained': snapshot.trained_at.strftime('%Y-%m-%d %H:%M:%S') if snapshot else None,
             'min_prices_required': self.min_prices,
             'max_prediction_days': 365
         }
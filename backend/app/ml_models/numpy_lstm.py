@@ -0,0 +1,203 @@
+"""
+TensorFlow-free inference for the LSTM price model.
+
+The trained Keras model (LSTM -> LSTM -> Dense -> Dense, see
+LSTMPredictor.build_model) is exported to a compact .npz file holding
+only the weights and activation names. NumpyLSTM runs the same forward
+pass with NumPy, batched over series and autoregressive over the
+horizon, so inference workers never need to import TensorFlow.
+
+Export and verify an existing model from the backend directory:
+    python -m app.ml_models.numpy_lstm lstm_model.h5 lstm_model.npz --verify
+"""
+import argparse
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+def _relu(x):
+    return np.maximum(x, 0.0)
+
+def _hard_sigmoid(x):
+    return np.clip(0.2 * x + 0.5, 0.0, 1.0)
+
+def _linear(x):
+    return x
+
+ACTIVATIONS = {
+    'sigmoid': _sigmoid,
+    'relu': _relu,
+    'tanh': np.tanh,
+    'hard_sigmoid': _hard_sigmoid,
+    'linear': _linear,
+}
+
+def export_keras_model(model, path: str):
+    """Write the LSTM/Dense weights of a Keras model to an .npz file"""
+    arrays = {}
+    layer_types, activations, recurrent_activations = [], [], []
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind == 'Dropout':
+            continue  # Inference-time no-op
+        if kind not in ('LSTM', 'Dense'):
+            raise ValueError(f"Layer type {kind} is not supported by the NumPy kernel")
+        index = len(layer_types)
+        config = layer.get_config()
+        weights = layer.get_weights()
+        if kind == 'LSTM':
+            arrays[f'layer{index}_kernel'] = weights[0]
+            arrays[f'layer{index}_recurrent_kernel'] = weights[1]
+            arrays[f'layer{index}_bias'] = weights[2] if len(weights) > 2 else np.zeros(weights[0].shape[1])
+            recurrent_activations.append(config.get('recurrent_activation', 'sigmoid'))
+        else:
+            arrays[f'layer{index}_kernel'] = weights[0]
+            arrays[f'layer{index}_bias'] = weights[1] if len(weights) > 1 else np.zeros(weights[0].shape[1])
+            recurrent_activations.append('')
+        layer_types.append(kind)
+        activations.append(config.get('activation', 'linear'))
+
+    np.savez_compressed(
+        path,
+        layer_types=np.array(layer_types),
+        activations=np.array(activations),
+        recurrent_activations=np.array(recurrent_activations),
+        **{name: np.asarray(value, dtype=np.float32) for name, value in arrays.items()}
+    )
+    logger.info(f"Exported {len(layer_types)} layers to {path}")
+
+class NumpyLSTM:
+    """Stacked LSTM/Dense forward pass over exported weights"""
+
+    def __init__(self, layers):
+        self.layers = layers
+
+    @classmethod
+    def load(cls, path: str) -> 'NumpyLSTM':
+        with np.load(path, allow_pickle=False) as data:
+            layer_types = [str(t) for t in data['layer_types']]
+            activations = [str(a) for a in data['activations']]
+            recurrent_activations = [str(a) for a in data['recurrent_activations']]
+            layers = []
+            for index, kind in enumerate(layer_types):
+                layer = {
+                    'type': kind,
+                    'activation': ACTIVATIONS[activations[index]],
+                    'kernel': data[f'layer{index}_kernel'],
+                    'bias': data[f'layer{index}_bias'],
+                }
+                if kind == 'LSTM':
+                    layer['recurrent_kernel'] = data[f'layer{index}_recurrent_kernel']
+                    layer['recurrent_activation'] = ACTIVATIONS[recurrent_activations[index]]
+                layers.append(layer)
+        return cls(layers)
+
+    @staticmethod
+    def _lstm(layer, x):
+        """Run one LSTM layer over x of shape (batch, time, features); returns all hidden states"""
+        kernel, recurrent_kernel, bias = layer['kernel'], layer['recurrent_kernel'], layer['bias']
+        act, recurrent_act = layer['activation'], layer['recurrent_activation']
+        batch, steps, _ = x.shape
+        units = recurrent_kernel.shape[0]
+
+        # Input projection for every timestep in one matmul
+        projected = x @ kernel + bias
+        h = np.zeros((batch, units), dtype=x.dtype)
+        c = np.zeros((batch, units), dtype=x.dtype)
+        outputs = np.empty((batch, steps, units), dtype=x.dtype)
+        for t in range(steps):
+            z = projected[:, t] + h @ recurrent_kernel
+            # Keras gate order: input, forget, cell, output
+            i = recurrent_act(z[:, :units])
+            f = recurrent_act(z[:, units:2 * units])
+            g = act(z[:, 2 * units:3 * units])
+            o = recurrent_act(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * act(c)
+            outputs[:, t] = h
+        return outputs
+
+    def forward(self, x: np.ndarray) -> np.ndarray:
+        """Model output for x of shape (batch, time, 1) -> (batch, 1)"""
+        x = np.asarray(x, dtype=np.float32)
+        for index, layer in enumerate(self.layers):
+            if layer['type'] == 'LSTM':
+                x = self._lstm(layer, x)
+                # Only keep the full sequence if the next layer is recurrent too
+                next_is_lstm = index + 1 < len(self.layers) and self.layers[index + 1]['type'] == 'LSTM'
+                if not next_is_lstm:
+                    x = x[:, -1]
+            else:
+                x = layer['activation'](x @ layer['kernel'] + layer['bias'])
+        return x
+
+    def forecast_scaled(self, windows: np.ndarray, steps: int) -> np.ndarray:
+        """
+        Autoregressive forecast in scaled space.
+        windows: (batch, sequence_length); returns (batch, steps).
+        """
+        window = np.array(windows, dtype=np.float32)
+        out = np.empty((window.shape[0], steps), dtype=np.float32)
+        for step in range(steps):
+            next_value = self.forward(window[:, :, None])[:, 0]
+            out[:, step] = next_value
+            window = np.roll(window, -1, axis=1)
+            window[:, -1] = next_value
+        return out
+
+    def forecast(self, windows: np.ndarray, steps: int) -> np.ndarray:
+        """
+        Forecast prices for a batch of raw price windows (batch, sequence_length).
+        Each window is min-max scaled on its own values, matching
+        LSTMPredictor.predict, and the forecast is scaled back.
+        """
+        windows = np.asarray(windows, dtype=np.float64)
+        low = windows.min(axis=1, keepdims=True)
+        span = windows.max(axis=1, keepdims=True) - low
+        span[span == 0] = 1.0  # Same guard as MinMaxScaler for constant input
+        scaled = self.forecast_scaled((windows - low) / span, steps)
+        return scaled.astype(np.float64) * span + low
+
+    @classmethod
+    def from_keras(cls, model) -> 'NumpyLSTM':
+        """Build a kernel directly from an in-memory Keras model"""
+        import io
+        buffer = io.BytesIO()
+        export_keras_model(model, buffer)
+        buffer.seek(0)
+        return cls.load(buffer)
+
+def max_abs_error(keras_model, kernel: NumpyLSTM, sequence_length: int = 10, samples: int = 256, seed: int = 0) -> float:
+    """Largest difference between Keras and NumPy outputs on random scaled inputs"""
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(0, 1, size=(samples, sequence_length, 1)).astype(np.float32)
+    expected = keras_model.predict(x, verbose=0)
+    return float(np.max(np.abs(expected - kernel.forward(x))))
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a Keras LSTM model to the NumPy kernel format")
+    parser.add_argument('keras_path')
+    parser.add_argument('npz_path')
+    parser.add_argument('--verify', action='store_true', help="Compare outputs against Keras")
+    parser.add_argument('--tolerance', type=float, default=1e-4)
+    args = parser.parse_args()
+
+    from tensorflow.keras.models import load_model
+    model = load_model(args.keras_path)
+    export_keras_model(model, args.npz_path)
+    print(f"Exported {args.keras_path} -> {args.npz_path}")
+
+    if args.verify:
+        error = max_abs_error(model, NumpyLSTM.load(args.npz_path))
+        print(f"Max abs error vs Keras: {error:.2e} (tolerance {args.tolerance:.0e})")
+        if error > args.tolerance:
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
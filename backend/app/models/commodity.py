@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..database import Base
@@ -34,6 +34,12 @@ class Price(Base):
 
 class Prediction(Base):
     __tablename__ = "predictions"
+    __table_args__ = (
+        # Latest forecast lookups: max(prediction_date) per commodity/model
+        Index("ix_predictions_latest", "commodity_id", "model_id", "prediction_date"),
+        # Accuracy backfill: unscored targets inside the grace window
+        Index("ix_predictions_target_date", "target_date", "accuracy"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     commodity_id = Column(Integer, ForeignKey("commodities.id"))
@@ -43,7 +49,9 @@ class Prediction(Base):
     confidence_upper = Column(Float)
     prediction_date = Column(DateTime)  # When the prediction was made
     target_date = Column(DateTime)      # Date for which price is predicted
-    accuracy = Column(Float)            # Accuracy of this specific prediction
+    horizon = Column(Integer)           # Step of the forecast run (1 = first step ahead)
+    run_type = Column(String(20), default="on_demand")  # "on_demand" or "precomputed"
+    accuracy = Column(Float)            # Accuracy of this specific prediction (NULL until realized)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
@@ -65,4 +73,24 @@ class Model(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
-    predictions = relationship("Prediction", back_populates="model") 
\ No newline at end of file
+    predictions = relationship("Prediction", back_populates="model") 
+
+class ForecastAccuracy(Base):
+    __tablename__ = "forecast_accuracy"
+    __table_args__ = (
+        UniqueConstraint("model_id", "commodity_id", "horizon", name="uq_forecast_accuracy_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    model_id = Column(Integer, ForeignKey("models.id"), index=True)
+    commodity_id = Column(Integer, ForeignKey("commodities.id"))
+    horizon = Column(Integer)
+    # Running sums so new realized targets can be folded in incrementally
+    count = Column(Integer, default=0)
+    sum_abs_error = Column(Float, default=0.0)
+    sum_abs_pct_error = Column(Float, default=0.0)
+    sum_sq_error = Column(Float, default=0.0)
+    mae = Column(Float)
+    mape = Column(Float)
+    rmse = Column(Float)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,277 @@
+"""
+Opt-in request profiling.
+
+A request is profiled when it carries `X-Profile-Token: <PROFILING_ADMIN_TOKEN>`
+or is picked by PROFILING_SAMPLE_RATE. Profiled requests run under cProfile
+(on the event loop and in executor work wrapped with `in_profile`) and
+record stage spans; the result is stored under PROFILE_DIR and announced
+in the X-Profile-Id and Server-Timing response headers. The event loop
+profile also contains whatever else the loop ran during the request.
+cProfile runs for one request at a time; requests profiled while it is
+busy record spans only.
+"""
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, PlainTextResponse
+
+from .instrumentation import METRICS_ALLOWED_HOSTS
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ADMIN_TOKEN = os.getenv("PROFILING_ADMIN_TOKEN", "")
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "agri-profiles")))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+PROFILE_HEADER = "x-profile-token"
+
+class RequestProfile:
+    """Spans and cProfile data collected for one request"""
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.created_at = time.time()
+        self.spans: List[dict] = []
+        self.profilers: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def add_span(self, name: str, start: float, duration: float):
+        with self._lock:
+            self.spans.append({
+                "name": name,
+                "start_ms": round((start - self.started) * 1000, 3),
+                "duration_ms": round(duration * 1000, 3),
+                "thread": threading.current_thread().name
+            })
+
+    def add_profiler(self, profiler: cProfile.Profile):
+        with self._lock:
+            self.profilers.append(profiler)
+
+    def server_timing(self) -> str:
+        """Spans as a Server-Timing header value"""
+        with self._lock:
+            spans = list(self.spans)
+        return ", ".join(f'{span["name"]};dur={span["duration_ms"]}' for span in spans)
+
+    def stats(self) -> Optional[pstats.Stats]:
+        with self._lock:
+            profilers = list(self.profilers)
+        if not profilers:
+            return None
+        stats = pstats.Stats(profilers[0])
+        for profiler in profilers[1:]:
+            stats.add(profiler)
+        return stats
+
+    def save(self, directory: Path = PROFILE_DIR, total: float = None):
+        """Write <id>.prof (pstats) and <id>.json (spans and top functions)"""
+        directory.mkdir(parents=True, exist_ok=True)
+        stats = self.stats()
+        summary = ""
+        if stats is not None:
+            stats.dump_stats(str(directory / f"{self.id}.prof"))
+            buffer = io.StringIO()
+            pstats.Stats(str(directory / f"{self.id}.prof"), stream=buffer).sort_stats("cumulative").print_stats(30)
+            summary = buffer.getvalue()
+        with open(directory / f"{self.id}.json", "w") as f:
+            json.dump({
+                "id": self.id,
+                "method": self.method,
+                "path": self.path,
+                "created_at": self.created_at,
+                "total_ms": round((total or 0.0) * 1000, 3),
+                "spans": self.spans,
+                "top_functions": summary
+            }, f, indent=2)
+        prune_profiles(directory, PROFILE_KEEP)
+
+current_profile: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar("current_profile", default=None)
+
+# Before Python 3.12 a cProfile profiler hooks the thread that enabled it,
+# so only one request profiles the event loop; from 3.12 it hooks the whole
+# process (sys.monitoring) and a second enabled profiler raises, so executor
+# work takes the same lock (the event loop profile then covers its threads)
+_profiler_busy = threading.Lock()
+PROCESS_WIDE_PROFILER = sys.version_info >= (3, 12)
+
+def start_profiler(exclusive: bool) -> Optional[cProfile.Profile]:
+    """Enabled profiler, or None when the lock is taken or another profiling tool is active"""
+    if exclusive and not _profiler_busy.acquire(blocking=False):
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        logger.debug(f"Profiler not started: {str(e)}")
+        if exclusive:
+            _profiler_busy.release()
+        return None
+    return profiler
+
+def stop_profiler(profiler: cProfile.Profile, profile: RequestProfile, exclusive: bool):
+    profiler.disable()
+    profile.add_profiler(profiler)
+    if exclusive:
+        _profiler_busy.release()
+
+@contextmanager
+def span(name: str):
+    """Record a stage of the current profiled request; no-op otherwise"""
+    profile = current_profile.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_span(name, start, time.perf_counter() - start)
+
+def in_profile(func: Callable) -> Callable:
+    """
+    Bind `func` to the caller's profile so work run in an executor thread
+    is profiled and its spans are recorded; returns `func` unchanged when
+    the request is not profiled.
+    """
+    profile = current_profile.get()
+    if profile is None:
+        return func
+
+    def run(*args, **kwargs):
+        token = current_profile.set(profile)
+        profiler = start_profiler(exclusive=PROCESS_WIDE_PROFILER)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if profiler is not None:
+                stop_profiler(profiler, profile, exclusive=PROCESS_WIDE_PROFILER)
+            current_profile.reset(token)
+    return run
+
+def should_profile(headers: dict) -> bool:
+    token = headers.get(PROFILE_HEADER)
+    if token is not None:
+        return bool(PROFILING_ADMIN_TOKEN) and token == PROFILING_ADMIN_TOKEN
+    return PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE
+
+def prune_profiles(directory: Path, keep: int):
+    """Keep only the newest `keep` profiles"""
+    profiles = sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in profiles[keep:]:
+        for path in (old, old.with_suffix(".prof")):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests selected by `should_profile`"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        if not should_profile(headers):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        token = current_profile.set(profile)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                extra = [(b"x-profile-id", profile.id.encode())]
+                timing = profile.server_timing()
+                if timing:
+                    extra.append((b"server-timing", timing.encode()))
+                message = {**message, "headers": list(message.get("headers", [])) + extra}
+            await send(message)
+
+        profiler = start_profiler(exclusive=True)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            total = time.perf_counter() - start
+            if profiler is not None:
+                stop_profiler(profiler, profile, exclusive=True)
+            current_profile.reset(token)
+            try:
+                profile.save(total=total)
+                logger.info(f"Stored profile {profile.id} for {profile.method} {profile.path} ({total * 1000:.1f} ms)")
+            except Exception as e:
+                logger.warning(f"Could not store profile {profile.id}: {str(e)}")
+
+router = APIRouter()
+
+def require_admin(request: Request):
+    """Profiles need the admin token, or a local client when no token is configured"""
+    if PROFILING_ADMIN_TOKEN:
+        if request.headers.get(PROFILE_HEADER) != PROFILING_ADMIN_TOKEN:
+            raise HTTPException(status_code=403, detail="Profiling requires the admin token")
+    elif not request.client or request.client.host not in METRICS_ALLOWED_HOSTS:
+        raise HTTPException(status_code=403, detail="Profiles are only available locally")
+
+def profile_path(profile_id: str, suffix: str) -> Path:
+    if not profile_id.isalnum():
+        raise HTTPException(status_code=400, detail="Invalid profile id")
+    path = PROFILE_DIR / f"{profile_id}{suffix}"
+    if not path.exists():
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return path
+
+@router.get("/")
+async def list_profiles(request: Request):
+    """Stored profiles, newest first"""
+    require_admin(request)
+    if not PROFILE_DIR.exists():
+        return []
+    profiles = []
+    for path in sorted(PROFILE_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True):
+        with open(path) as f:
+            data = json.load(f)
+        profiles.append({key: data[key] for key in ("id", "method", "path", "created_at", "total_ms")})
+    return profiles
+
+@router.get("/{profile_id}")
+async def get_profile(profile_id: str, request: Request):
+    """Spans and top functions of a stored profile"""
+    require_admin(request)
+    with open(profile_path(profile_id, ".json")) as f:
+        return json.load(f)
+
+@router.get("/{profile_id}/download")
+async def download_profile(profile_id: str, request: Request, format: str = "pstats"):
+    """The raw cProfile dump (load with pstats or snakeviz), or its text summary"""
+    require_admin(request)
+    if format == "text":
+        with open(profile_path(profile_id, ".json")) as f:
+            return PlainTextResponse(json.load(f)["top_functions"])
+    return FileResponse(
+        profile_path(profile_id, ".prof"),
+        media_type="application/octet-stream",
+        filename=f"profile-{profile_id}.prof"
+    )
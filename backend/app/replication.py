@@ -0,0 +1,138 @@
+"""
+Replica health for read routing.
+
+Replication progress is tracked with a write watermark of the tables the
+read routes serve (newest price, newest commodity change). The monitor
+samples the primary's watermark with the time it was first seen; the lag
+is the age of the oldest sample the replica has not reached (ahead of the
+replica's watermark in either component), i.e. the time since the primary
+first moved past the replica. The replica does not need to match a sample
+exactly, which it rarely does behind a continuously written primary. That
+works for
+any backend, including a second SQLite file kept in sync by a copy job,
+and stays small for a replica that trails a busy primary by a few seconds.
+Reads fall back to the primary while the replica is unreachable or lags
+more than the allowed maximum.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Optional, Tuple
+
+from sqlalchemy import text
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_QUERY = text(
+    "SELECT (SELECT MAX(id) FROM prices), (SELECT MAX(updated_at) FROM commodities)"
+)
+
+# Primary watermarks remembered while the replica catches up
+WATERMARK_HISTORY = 1024
+
+read_routes = registry.counter(
+    "db_read_sessions_total", "Read sessions by the engine that served them", ("engine", "reason")
+)
+
+class ReplicaMonitor:
+    def __init__(self, primary, replica, max_lag: float, check_interval: float):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.behind_since: Optional[float] = None
+        # (watermark, when the primary was first seen at it), oldest first
+        self.history: Deque[Tuple[Tuple, float]] = deque(maxlen=WATERMARK_HISTORY)
+        self.reachable = True
+        self.checked_at = 0.0
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def watermark(engine) -> Tuple[int, float]:
+        """(newest price id, newest commodity change as epoch seconds); both only grow"""
+        with engine.connect() as conn:
+            price_id, updated_at = conn.execute(WATERMARK_QUERY).one()
+        if isinstance(updated_at, str):
+            # SQLite returns MAX() of a DateTime column as text
+            updated_at = datetime.fromisoformat(updated_at)
+        updated_epoch = updated_at.replace(tzinfo=timezone.utc).timestamp() if updated_at else 0.0
+        return (int(price_id or 0), updated_epoch)
+
+    def check(self):
+        """Compare watermarks; other callers keep using the last result while one check runs"""
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            try:
+                replica_mark = self.watermark(self.replica)
+                self.reachable = True
+                self.last_error = None
+            except Exception as e:
+                if self.reachable:
+                    logger.warning(f"Replica unreachable, reading from the primary: {str(e)}")
+                self.reachable = False
+                self.last_error = str(e)
+                return
+            primary_mark = self.watermark(self.primary)
+            if not self.history or self.history[-1][0] != primary_mark:
+                self.history.append((primary_mark, now))
+            self.behind_since = self.missing_since(replica_mark)
+        except Exception as e:
+            logger.warning(f"Replica lag check failed: {str(e)}")
+        finally:
+            self.checked_at = time.monotonic()
+            self._lock.release()
+
+    def missing_since(self, replica_mark: Tuple[int, float]) -> Optional[float]:
+        """
+        When the primary was first seen past `replica_mark` (ahead in either
+        component), or None if the replica has everything sampled so far
+        """
+        # Marks the replica has reached are no longer needed
+        while self.history and all(p <= r for p, r in zip(self.history[0][0], replica_mark)):
+            self.history.popleft()
+        if not self.history:
+            return None
+        # Samples only grow, so the oldest remaining one is the first the replica lacks;
+        # when even that predates monitoring, the replica is behind at least since then
+        return self.history[0][1]
+
+    def lag(self) -> float:
+        return time.monotonic() - self.behind_since if self.behind_since is not None else 0.0
+
+    def route(self) -> str:
+        """'replica', or the reason reads go to the primary"""
+        if time.monotonic() - self.checked_at >= self.check_interval:
+            self.check()
+        if not self.reachable:
+            return "replica_unreachable"
+        if self.lag() > self.max_lag:
+            return "replica_lagging"
+        return "replica"
+
+    def stats(self) -> dict:
+        return {
+            "reachable": self.reachable,
+            "lag_seconds": round(self.lag(), 3),
+            "max_lag_seconds": self.max_lag,
+            "last_error": self.last_error,
+        }
+
+# The configured replica's monitor, if any
+replica_monitor: Optional[ReplicaMonitor] = None
+
+def monitor_replica(primary, replica, max_lag: float, check_interval: float) -> ReplicaMonitor:
+    global replica_monitor
+    replica_monitor = ReplicaMonitor(primary, replica, max_lag, check_interval)
+    return replica_monitor
+
+registry.gauge(
+    "db_replica_lag_seconds", "Age of the oldest primary write the replica is missing", (),
+    lambda: {(): replica_monitor.lag()} if replica_monitor is not None else {}
+)
@@ -1,9 +1,14 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
 from typing import List, Optional
+from sqlalchemy import and_, func, select
 from sqlalchemy.orm import Session
-from ..database import get_db
+from ..database import get_read_db
+from ..admission import catalog_limiter
+from ..cache import conditional_response
+from ..catalog import catalog_versions, commodity_validators, version_etag
 from ..models.commodity import Commodity as CommodityModel, Price
+from ..serialization import iso_dates
 from datetime import datetime
 
 router = APIRouter()
@@ -16,95 +21,98 @@ class Commodity(BaseModel):
     unit: str
     last_updated: str
 
-@router.get("/", response_model=List[Commodity])
+def fetch_commodities(db: Session, where=None) -> List[dict]:
+    """
+    Commodities with their latest price in a single Core query
+    (instead of one latest-price query per commodity).
+    """
+    commodities = CommodityModel.__table__
+    prices = Price.__table__
+    latest = select(
+        prices.c.commodity_id,
+        func.max(prices.c.timestamp).label("timestamp")
+    ).group_by(prices.c.commodity_id).subquery()
+
+    stmt = select(
+        commodities.c.id,
+        commodities.c.name,
+        commodities.c.category,
+        commodities.c.unit,
+        prices.c.price,
+        prices.c.timestamp
+    ).select_from(
+        commodities
+        .outerjoin(latest, latest.c.commodity_id == commodities.c.id)
+        .outerjoin(prices, and_(
+            prices.c.commodity_id == commodities.c.id,
+            prices.c.timestamp == latest.c.timestamp
+        ))
+    ).order_by(commodities.c.id)
+    if where is not None:
+        stmt = stmt.where(where)
+
+    rows = []
+    seen = set()
+    for row in db.execute(stmt):
+        # Two prices sharing the latest timestamp would repeat a commodity
+        if row.id in seen:
+            continue
+        seen.add(row.id)
+        rows.append(row)
+
+    today = datetime.now().strftime("%Y-%m-%d")
+    last_updated = iso_dates([row.timestamp for row in rows], default=today)
+    return [{
+        "id": str(row.id),
+        "name": row.name,
+        "category": row.category,
+        "current_price": row.price if row.price is not None else 0.0,
+        "unit": row.unit,
+        "last_updated": updated
+    } for row, updated in zip(rows, last_updated)]
+
+@router.get("/", response_model=List[Commodity], dependencies=[Depends(catalog_limiter)])
 async def get_commodities(
+    request: Request,
     category: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     try:
-        # Query from database
-        query = db.query(CommodityModel)
+        version = catalog_versions.get(db)
+        where = None
         if category:
-            query = query.filter(CommodityModel.category.ilike(f"%{category}%"))
-        
-        commodities = query.all()
-        
-        if not commodities:
-            return []
-            
-        # Format response
-        result = []
-        for commodity in commodities:
-            # Get the latest price
-            latest_price = db.query(Price)\
-                .filter(Price.commodity_id == commodity.id)\
-                .order_by(Price.timestamp.desc())\
-                .first()
-                
-            price_value = 0.0
-            last_updated = datetime.now().strftime("%Y-%m-%d")
-            
-            if latest_price:
-                price_value = latest_price.price
-                last_updated = latest_price.timestamp.strftime("%Y-%m-%d")
-                
-            result.append({
-                "id": commodity.id,
-                "name": commodity.name,
-                "category": commodity.category,
-                "current_price": price_value,
-                "unit": commodity.unit,
-                "last_updated": last_updated
-            })
-            
-        return result
-        
+            # Category match comes from the in-memory index; the query is a primary key lookup
+            ids = [entry.id for entry in version.index.in_category(category)]
+            where = CommodityModel.__table__.c.id.in_(ids)
+        etag = version_etag("commodities", category or "", version.token)
+        return conditional_response(request, etag, version.latest_price, lambda: fetch_commodities(db, where))
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{commodity_id}", response_model=Commodity)
+@router.get("/{commodity_id}", response_model=Commodity, dependencies=[Depends(catalog_limiter)])
 async def get_commodity(
     commodity_id: str,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: Session = Depends(get_read_db)
 ):
     try:
-        # Query from database (try direct match first)
-        commodity = db.query(CommodityModel)\
-            .filter(CommodityModel.id == commodity_id)\
-            .first()
-            
-        # If not found, try matching by name
-        if not commodity:
-            commodity = db.query(CommodityModel)\
-                .filter(CommodityModel.name.ilike(f"%{commodity_id}%"))\
-                .first()
-        
-        if not commodity:
+        version = catalog_versions.get(db)
+        # Match by id, name or name fragment without touching the database
+        entry = version.resolve(commodity_id)
+        if entry is None:
             raise HTTPException(status_code=404, detail="Commodity not found")
-            
-        # Get the latest price
-        latest_price = db.query(Price)\
-            .filter(Price.commodity_id == commodity.id)\
-            .order_by(Price.timestamp.desc())\
-            .first()
-            
-        price_value = 0.0
-        last_updated = datetime.now().strftime("%Y-%m-%d")
-        
-        if latest_price:
-            price_value = latest_price.price
-            last_updated = latest_price.timestamp.strftime("%Y-%m-%d")
-            
-        return {
-            "id": commodity.id,
-            "name": commodity.name,
-            "category": commodity.category,
-            "current_price": price_value,
-            "unit": commodity.unit,
-            "last_updated": last_updated
-        }
-        
+
+        def load():
+            result = fetch_commodities(db, CommodityModel.__table__.c.id == entry.id)
+            if not result:
+                raise HTTPException(status_code=404, detail="Commodity not found")
+            return result[0]
+
+        etag, last_modified = commodity_validators(version, entry, "commodity")
+        return conditional_response(request, etag, last_modified, load)
+
     except HTTPException as he:
         raise he
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,7 +1,19 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
 from typing import List, Optional
 from enum import Enum
+import math
+import json
+import os
+from ..admission import ml_limiter
+from ..cache import ResponseCache, cached_response
+from ..executors import ml_executor
+from ..database import get_db
+from ..models.commodity import Commodity, Model, ForecastAccuracy
+from ..ml_models.backtest import run_backtest, load_series
+from ..ml_models.model_manager import model_manager
+import asyncio
 
 router = APIRouter()
 
@@ -18,59 +30,167 @@ class ModelInfo(BaseModel):
     accuracy: float
     last_trained: str
     supported_commodities: List[str]
+    status: Optional[str] = None
+    is_trained: bool = False
 
-# Sample model information (replace with database in production)
-SAMPLE_MODELS = [
-    {
-        "id": "arima-001",
-        "name": "ARIMA Price Predictor",
-        "type": "ARIMA",
-        "description": "Time series forecasting model using ARIMA for short-term predictions",
-        "accuracy": 0.85,
-        "last_trained": "2024-03-15",
-        "supported_commodities": ["wheat-001", "rice-001", "corn-001"]
-    },
-    {
-        "id": "lstm-001",
-        "name": "LSTM Deep Learning Model",
-        "type": "LSTM",
-        "description": "Deep learning model for long-term price predictions with multiple features",
-        "accuracy": 0.88,
-        "last_trained": "2024-03-18",
-        "supported_commodities": ["wheat-001", "rice-001"]
-    }
-]
+class BacktestRequest(BaseModel):
+    commodity_ids: Optional[List[str]] = None
+    model_names: List[str] = ["arima", "lstm"]
+    initial_train: int = 36
+    horizon: int = 3
+    step: int = 3
+    window: str = "expanding"
+    warm_start: bool = False
+    max_workers: Optional[int] = None
+
+models_cache = ResponseCache(ttl_seconds=float(os.getenv("MODELS_CACHE_TTL", "60")))
+# Training changes is_trained/last_trained, so drop cached listings when it completes
+model_manager.add_training_listener(models_cache.invalidate)
+
+def model_public_id(model: Model) -> str:
+    """Catalog id such as 'lstm-001' for a models row"""
+    return f"{model.type.lower()}-{model.id:03d}"
+
+def serialize_model(model: Model, commodity_ids: List[str]) -> dict:
+    """Combine a models row with the registry state into a ModelInfo payload"""
+    registry_name = model.type.lower()
+    is_trained = registry_name in model_manager.models and \
+        model_manager.get_model_info(registry_name)["is_trained"]
+    return ModelInfo(
+        id=model_public_id(model),
+        name=model.name,
+        type=model.type,
+        description=model.description or "",
+        accuracy=model.accuracy or 0.0,
+        last_trained=model.last_trained.strftime("%Y-%m-%d") if model.last_trained else "",
+        supported_commodities=commodity_ids,
+        status=model.status,
+        is_trained=is_trained
+    ).dict()
+
+def load_models(db: Session, model_type: Optional[ModelType] = None) -> List[dict]:
+    query = db.query(Model)
+    if model_type:
+        query = query.filter(Model.type == model_type.value)
+    commodity_ids = [str(commodity_id) for commodity_id, in db.query(Commodity.id).all()]
+    return [serialize_model(model, commodity_ids) for model in query.order_by(Model.id).all()]
+
+def resolve_model_row(db: Session, model_id: str) -> Optional[Model]:
+    """
+    Find a models row by numeric id, by catalog id such as 'lstm-001' (type
+    and id must both match) or by bare type ('lstm', the first of that type).
+    Returns None when nothing matches exactly, which callers answer with 404.
+    """
+    if model_id.isdigit():
+        return db.query(Model).filter(Model.id == int(model_id)).first()
+    model_type, _, number = model_id.partition("-")
+    query = db.query(Model).filter(Model.type == model_type.upper())
+    if number:
+        if not number.isdigit():
+            return None
+        return query.filter(Model.id == int(number)).first()
+    return query.order_by(Model.id).first()
 
 @router.get("/", response_model=List[ModelInfo])
-async def get_models(model_type: Optional[ModelType] = None):
+async def get_models(
+    request: Request,
+    model_type: Optional[ModelType] = None,
+    db: Session = Depends(get_db)
+):
     try:
-        if model_type:
-            return [m for m in SAMPLE_MODELS if m["type"] == model_type]
-        return SAMPLE_MODELS
+        entry = models_cache.get_or_set(("list", model_type), lambda: load_models(db, model_type))
+        return cached_response(request, entry)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/backtest", dependencies=[Depends(ml_limiter)])
+async def backtest_models(request: BacktestRequest, db: Session = Depends(get_db)):
+    """Run a rolling-origin backtest and return summary metrics with per-fold timings"""
+    try:
+        series = load_series(db, request.commodity_ids)
+        if not series:
+            raise HTTPException(status_code=404, detail="No commodities found for backtest")
+
+        loop = asyncio.get_running_loop()
+        summary, folds = await loop.run_in_executor(ml_executor, lambda: run_backtest(
+            series,
+            model_names=request.model_names,
+            initial_train=request.initial_train,
+            horizon=request.horizon,
+            step=request.step,
+            window=request.window,
+            warm_start=request.warm_start,
+            max_workers=request.max_workers
+        ))
+        # Round-trip through JSON so NaN becomes null
+        return {
+            "summary": json.loads(summary.to_json(orient="records")),
+            "folds": json.loads(folds.to_json(orient="records"))
+        }
+    except HTTPException as he:
+        raise he
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/inference/stats")
+async def get_inference_stats():
+    """Batch size and queue wait metrics of the inference dispatcher"""
+    return model_manager.get_batching_stats()
+
 @router.get("/{model_id}", response_model=ModelInfo)
-async def get_model(model_id: str):
+async def get_model(model_id: str, request: Request, db: Session = Depends(get_db)):
     try:
-        model = next((m for m in SAMPLE_MODELS if m["id"] == model_id), None)
-        if not model:
-            raise HTTPException(status_code=404, detail="Model not found")
-        return model
+        entry = models_cache.get(("model", model_id))
+        if entry is None:
+            model = resolve_model_row(db, model_id)
+            if not model:
+                raise HTTPException(status_code=404, detail="Model not found")
+            commodity_ids = [str(commodity_id) for commodity_id, in db.query(Commodity.id).all()]
+            entry = models_cache.set(("model", model_id), serialize_model(model, commodity_ids))
+        return cached_response(request, entry)
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{model_id}/metrics")
-async def get_model_metrics(model_id: str):
+async def get_model_metrics(model_id: str, db: Session = Depends(get_db)):
+    """Serve accuracy metrics precomputed by the accuracy backfill job"""
     try:
-        # Placeholder for model metrics
+        model = resolve_model_row(db, model_id)
+        if not model:
+            raise HTTPException(status_code=404, detail="Model not found")
+
+        rows = db.query(ForecastAccuracy)\
+            .filter(ForecastAccuracy.model_id == model.id)\
+            .order_by(ForecastAccuracy.commodity_id, ForecastAccuracy.horizon)\
+            .all()
+
+        count = sum(row.count for row in rows)
+        metrics = {"mae": None, "mape": None, "rmse": None, "count": count}
+        if count:
+            metrics.update({
+                "mae": sum(row.sum_abs_error for row in rows) / count,
+                "mape": sum(row.sum_abs_pct_error for row in rows) / count,
+                "rmse": math.sqrt(sum(row.sum_sq_error for row in rows) / count)
+            })
+
         return {
             "model_id": model_id,
-            "metrics": {
-                "mse": 0.15,
-                "mae": 0.12,
-                "r2_score": 0.85
-            }
+            "metrics": metrics,
+            "breakdown": [{
+                "commodity_id": row.commodity_id,
+                "horizon": row.horizon,
+                "count": row.count,
+                "mae": row.mae,
+                "mape": row.mape,
+                "rmse": row.rmse,
+                "updated_at": row.updated_at.strftime("%Y-%m-%d %H:%M:%S") if row.updated_at else None
+            } for row in rows]
         }
+    except HTTPException as he:
+        raise he
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,18 +1,21 @@
 from fastapi import APIRouter, HTTPException, Depends, Request
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from ..database import get_db
-from ..models.commodity import Price, Commodity
-from ..ml_models.model_manager import model_manager
+from typing import List
+from ..database import get_db, get_read_db
+from ..models.commodity import Price
 from pydantic import BaseModel
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
 import pandas as pd
-from ..models.prediction import Prediction
-from ..ml_models.lstm_model import LSTMModel
-from ..ml_models.arima_model import ARIMAModel
-import numpy as np
-import json
+from ..utils import get_model_id, get_latest_prediction
+from ..forecasting import generate_predictions, load_precomputed_predictions
+from ..singleflight import SingleFlight
+from ..admission import ml_limiter, catalog_limiter
+from ..profiling import span
+from ..cache import conditional_response
+from ..catalog import catalog_versions, commodity_validators
+from ..serialization import iso_dates
+from sqlalchemy import select
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -48,76 +51,56 @@ def generate_monthly_dates(start_date: datetime, num_months: int) -> List[str]:
             current_date = current_date.replace(month=current_date.month + 1)
     return dates
 
-@router.post("/predict", response_model=List[PredictionResponse])
+# Identical forecasts requested at the same time share one computation
+prediction_flight = SingleFlight("predictions")
+
+def prediction_key(commodity_id: int, request: PredictionRequest):
+    """Parameters that identify a forecast"""
+    return (commodity_id, request.model_name.lower(), request.prediction_horizon)
+
+def resolve_commodity(db: Session, identifier: str):
+    """Catalog entry for a commodity id or name; 404 when there is none"""
+    entry = catalog_versions.get(db).resolve(identifier)
+    if entry is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Commodity {identifier} not found"
+        )
+    return entry
+
+@router.post("/predict", response_model=List[PredictionResponse], dependencies=[Depends(ml_limiter)])
 async def create_prediction(
     request: PredictionRequest,
     db: Session = Depends(get_db)
 ):
     """Create price predictions for the next N months"""
     try:
-        logger.info(f"Creating prediction for {request.commodity_id} using {request.model_name}")
-        
-        commodity_id = request.commodity_id
-        model_name = request.model_name
-        prediction_horizon = request.prediction_horizon
-        
-        logger.info(f"Parameters: commodity_id={commodity_id}, model_name={model_name}, prediction_horizon={prediction_horizon}")
-        
-        # Generate mock data for all cases to ensure it works
-        today = datetime.now()
-        future_dates = []
-        for i in range(prediction_horizon):
-            month = (today.month + i) % 12 + 1
-            year = today.year + ((today.month + i) // 12)
-            future_dates.append(datetime(year, month, 1))
-        
-        predictions = []
-        base_price = 2500.0  # Default price if no data
-        
-        # Try to get commodity price from database if it exists
-        try:
-            commodity = db.query(Commodity).filter(Commodity.id == commodity_id).first()
-            if commodity:
-                base_price = commodity.current_price
-        except Exception as e:
-            logger.warning(f"Could not fetch commodity price: {str(e)}")
-        
-        # Generate mock predictions for both models
-        selected_models = []
-        if model_name == "lstm" or model_name == "lstm_arima":
-            selected_models.append("lstm")
-        if model_name == "arima" or model_name == "lstm_arima":
-            selected_models.append("arima")
-            
-        for model in selected_models:
-            for i in range(prediction_horizon):
-                # LSTM has steady growth, ARIMA has more volatility
-                if model == "lstm":
-                    price = base_price * (1 + 0.05 * (i+1))
-                    confidence = price * 0.1
-                else:
-                    price = base_price * (1 + 0.03 * (i+1) + (0.02 * np.random.randn()))
-                    confidence = price * 0.15
-                    
-                predictions.append({
-                    "id": len(predictions) + 1,
-                    "commodity_id": commodity_id,
-                    "value": float(price),
-                    "prediction_date": future_dates[i].strftime('%Y-%m-%d'),
-                    "model_name": model,
-                    "days_ahead": i + 1,
-                    "confidence_lower": float(price - confidence),
-                    "confidence_upper": float(price + confidence)
-                })
-        
-        logger.info(f"Generated {len(predictions)} predictions")
-        return predictions
+        # Names and ids (e.g. 'wheat', '3') map to the integer id used for every lookup below
+        commodity_id = resolve_commodity(db, request.commodity_id).id
+
+        # Standard horizons are served from the nightly precomputed forecasts
+        with span("fetch_precomputed"):
+            precomputed = load_precomputed_predictions(
+                db, commodity_id, request.model_name, request.prediction_horizon
+            )
+        if precomputed is not None:
+            return precomputed
 
+        # Other horizons are forecast by the trained models from the price history
+        return await prediction_flight.do(
+            prediction_key(commodity_id, request),
+            lambda: generate_predictions(commodity_id, request.model_name, request.prediction_horizon)
+        )
+    except HTTPException as he:
+        raise he
+    except ValueError as ve:
+        # Too little price history or an unsupported horizon
+        raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         logger.error(f"Error creating prediction: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/download/{commodity_id}")
+@router.get("/download/{commodity_id}", dependencies=[Depends(ml_limiter)])
 async def download_predictions(commodity_id: str, db: Session = Depends(get_db)):
     """Download predictions as CSV"""
     try:
@@ -125,63 +108,106 @@ async def download_predictions(commodity_id: str, db: Session = Depends(get_db))
         predictions = await create_prediction(request=request, db=db)
         df = pd.DataFrame(predictions)
         return df.to_csv(index=False)
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logger.error(f"Error downloading predictions: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/historical/{commodity}")
-async def get_historical_prices(
-    commodity: str,
-    db: Session = Depends(get_db),
-    days: int = 60
+@router.get("/latest/{commodity_id}", response_model=List[PredictionResponse], dependencies=[Depends(catalog_limiter)])
+async def get_latest_predictions(
+    commodity_id: str,
+    model_name: str = "lstm",
+    db: Session = Depends(get_db)
 ):
+    """Return the most recently stored forecast run without recomputing it"""
     try:
-        logger.info(f"Fetching historical prices for {commodity}")
-        
-        # Get commodity (try by name first, then by ID)
-        commodity_obj = db.query(Commodity)\
-            .filter(Commodity.name == commodity.capitalize())\
-            .first()
-            
-        if not commodity_obj:
-            # Try by ID pattern (e.g., 'wheat-001')
-            commodity_obj = db.query(Commodity)\
-                .filter(Commodity.id == f"{commodity.lower()}-001")\
-                .first()
-        
-        if not commodity_obj:
+        entry = resolve_commodity(db, commodity_id)
+        model_id = get_model_id(db, model_name)
+        if model_id is None:
+            raise HTTPException(status_code=404, detail=f"Model {model_name} not found")
+
+        rows = get_latest_prediction(db, entry.id, model_id)
+        if not rows:
             raise HTTPException(
                 status_code=404,
-                detail=f"Commodity {commodity} not found"
+                detail=f"No stored forecast for {commodity_id} using {model_name}"
             )
 
-        # Get historical prices
-        prices = db.query(Price)\
-            .filter(Price.commodity_id == commodity_obj.id)\
-            .order_by(Price.timestamp.desc())\
-            .limit(days)\
-            .all()
+        return [{
+            "id": row.id,
+            "commodity_id": entry.key,
+            "value": row.predicted_price,
+            "prediction_date": row.target_date.strftime('%Y-%m-%d'),
+            "model_name": model_name.lower(),
+            "days_ahead": i + 1,
+            "confidence_lower": row.confidence_lower,
+            "confidence_upper": row.confidence_upper
+        } for i, row in enumerate(rows)]
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Error fetching latest predictions: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/coalescing/stats")
+async def get_coalescing_stats():
+    """How many prediction requests were served by an in-flight computation"""
+    return prediction_flight.stats()
+
+@router.get("/historical/{commodity}", dependencies=[Depends(catalog_limiter)])
+async def get_historical_prices(
+    commodity: str,
+    request: Request,
+    db: Session = Depends(get_read_db),
+    days: int = 60
+):
+    def load():
+        logger.info(f"Fetching historical prices for {commodity}")
 
-        if not prices:
+        # Get historical prices as plain Core rows
+        prices = Price.__table__
+        rows = db.execute(
+            select(prices.c.timestamp, prices.c.price, prices.c.volume)
+            .where(prices.c.commodity_id == entry.id)
+            .order_by(prices.c.timestamp.desc())
+            .limit(days)
+        ).all()
+
+        if not rows:
             raise HTTPException(
                 status_code=404,
                 detail=f"No historical data found for {commodity}"
             )
 
         # Format response
-        price_data = [{
-            "date": price.timestamp.strftime("%Y-%m-%d"),
-            "price": price.price,
-            "volume": price.volume
-        } for price in prices]
+        timestamps, values, volumes = zip(*rows)
+        price_data = [
+            {"date": date, "price": price, "volume": volume}
+            for date, price, volume in zip(iso_dates(timestamps), values, volumes)
+        ]
 
         logger.info(f"Successfully retrieved {len(price_data)} historical prices")
         return {
-            "commodity": commodity_obj.name,
+            "commodity": entry.name,
             "prices": price_data
         }
+
+    try:
+        # Resolve the name or id (e.g. 'wheat', 'wheat-001') from the in-memory index
+        version = catalog_versions.get(db)
+        entry = version.resolve(commodity)
+        if entry is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Commodity {commodity} not found"
+            )
+
+        # Answer revalidations from the catalog version without querying prices
+        etag, last_modified = commodity_validators(version, entry, "historical", days)
+        return conditional_response(request, etag, last_modified, load)
     except HTTPException as he:
         raise he
     except Exception as e:
         logger.error(f"Error fetching historical prices: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e)) 
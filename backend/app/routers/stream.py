@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import List, Optional
+import asyncio
+import logging
+
+from ..catalog import catalog_versions
+from ..database import get_read_db
+from ..events import SSE_HEARTBEAT, SSE_MAX_SUBSCRIBERS, encode_event, event_broker
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.get("/")
+async def stream_updates(
+    request: Request,
+    commodity: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Server-sent events with new prices (`price`) and refreshed forecasts
+    (`forecast`) for the given commodities (ids or names), or all of them
+    """
+    try:
+        topics = set()
+        if commodity:
+            version = catalog_versions.get(db)
+            for identifier in commodity:
+                entry = version.resolve(identifier)
+                if entry is None:
+                    raise HTTPException(status_code=404, detail=f"Commodity {identifier} not found")
+                topics.add(entry.key)
+        # The stream outlives the request; do not hold a pooled connection for it
+        db.close()
+
+        if event_broker.stats()["subscribers"] >= SSE_MAX_SUBSCRIBERS:
+            raise HTTPException(status_code=503, detail="Too many live subscribers", headers={"Retry-After": "30"})
+        subscription = event_broker.subscribe(topics)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error opening update stream: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def events():
+        try:
+            yield encode_event(0, "ready", {"commodities": sorted(topics) or "all"})
+            while True:
+                try:
+                    payload = await asyncio.wait_for(subscription.queue.get(), SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    payload = b": keep-alive\n\n"
+                yield payload
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # Deliver events immediately through nginx
+    })
+
+@router.get("/stats")
+async def stream_stats():
+    """Open live streams and their subscriptions per commodity"""
+    return event_broker.stats()
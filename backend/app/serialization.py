@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence, List
+
+import numpy as np
+from fastapi.responses import ORJSONResponse
+
+def iso_dates(timestamps: Sequence[Optional[datetime]], default: Optional[str] = None) -> List[str]:
+    """
+    'YYYY-MM-DD' strings for a column of datetimes, converted in one
+    vectorized pass instead of one strftime per row. Missing values
+    become `default`.
+    """
+    if len(timestamps) == 0:
+        return []
+    days = np.array(timestamps, dtype="datetime64[D]")
+    dates = days.astype(str)
+    if default is not None:
+        dates[np.isnat(days)] = default
+    return dates.tolist()
+
+def fast_response(content: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> ORJSONResponse:
+    """
+    Encode trusted, already-shaped data with orjson. Returning a Response
+    skips response_model revalidation, so only use it for payloads built
+    from our own queries.
+    """
+    return ORJSONResponse(content=content, status_code=status_code, headers=headers)
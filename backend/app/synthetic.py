@@ -0,0 +1,215 @@
+"""
+Vectorized synthetic market data for seeding, load and scale tests.
+
+Prices follow the model used by seed_data: a base price per commodity,
+a seasonal premium in its peak months (+15%) and the months next to them
+(+8%), a linear trend over the generated period, +/-2% random variation
+and a 1-3% weekday premium. Everything is computed with NumPy for a block
+of commodities at a time, so memory stays bounded at any scale.
+
+Generate into the configured database from the backend directory:
+    python -m app.synthetic --commodities 10000 --years 27 --freq daily
+or write CSV chunks for a bulk loader:
+    python -m app.synthetic --commodities 10000 --years 27 --csv-dir /data/prices
+"""
+import argparse
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from .models.commodity import Commodity
+from .utils import insert_commodity_data, insert_price_frame
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class CommodityProfile:
+    name: str
+    category: str
+    base_price: float  # INR per quintal
+    peak_months: Sequence[int]
+
+# Current market prices in INR (as of 2024) and seasonal peak months
+SEED_PROFILES = [
+    CommodityProfile("Wheat", "Cereals", 2600, (3, 4)),        # March-April
+    CommodityProfile("Rice", "Cereals", 4200, (9, 10)),        # September-October
+    CommodityProfile("Corn", "Cereals", 2100, (8, 9)),         # August-September
+    CommodityProfile("Soybean", "Oilseeds", 4800, (10, 11)),   # October-November
+    CommodityProfile("Cotton", "Fibers", 6500, (11, 12)),      # November-December
+    CommodityProfile("Sugarcane", "Cash Crops", 315, (1, 2)),  # January-February
+    CommodityProfile("Groundnut", "Oilseeds", 5800, (10, 11)), # October-November
+    CommodityProfile("Mustard", "Oilseeds", 5200, (2, 3)),     # February-March
+]
+
+FREQUENCIES = {"daily": "D", "monthly": "MS"}
+
+def make_profiles(count: int, seed: int = 0) -> List[CommodityProfile]:
+    """
+    `count` commodity profiles: the seed commodities first, then variants of
+    them with a scaled base price and shifted season
+    """
+    rng = np.random.default_rng(seed)
+    profiles = list(SEED_PROFILES[:count])
+    for i in range(len(profiles), count):
+        template = SEED_PROFILES[i % len(SEED_PROFILES)]
+        shift = int(rng.integers(0, 12))
+        profiles.append(CommodityProfile(
+            name=f"{template.name} {i + 1:05d}",
+            category=template.category,
+            base_price=round(template.base_price * float(rng.uniform(0.8, 1.2)), 2),
+            peak_months=tuple((month - 1 + shift) % 12 + 1 for month in template.peak_months)
+        ))
+    return profiles
+
+def price_dates(periods: int, freq: str = "daily", end: Optional[datetime] = None) -> pd.DatetimeIndex:
+    """`periods` timestamps ending at `end` (now by default), oldest first"""
+    return pd.date_range(end=end or datetime.utcnow(), periods=periods, freq=FREQUENCIES[freq])
+
+def seasonal_factors(peak_months: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """(commodities, dates) matrix: 1.15 in peak months, 1.08 next to them, else 1.0"""
+    months = months[None, :, None]
+    peaks = peak_months[:, None, :]
+    in_peak = (months == peaks).any(axis=2)
+    # Same neighbour rule as seed_data (no wrap-around between December and January)
+    adjacent = ((months - 1) == peaks).any(axis=2) | ((months + 1) == peaks).any(axis=2)
+    return np.where(in_peak, 1.15, np.where(adjacent, 1.08, 1.0))
+
+def generate_price_matrix(
+    profiles: Sequence[CommodityProfile],
+    dates: pd.DatetimeIndex,
+    rng: np.random.Generator
+) -> np.ndarray:
+    """Prices for every profile (rows) and date (columns)"""
+    n, periods = len(profiles), len(dates)
+    base = np.array([p.base_price for p in profiles], dtype=float)[:, None]
+    width = max(len(p.peak_months) for p in profiles)
+    peaks = np.array([tuple(p.peak_months) + (0,) * (width - len(p.peak_months)) for p in profiles])
+
+    seasonal = seasonal_factors(peaks, dates.month.to_numpy())
+    # The trend reaches `trend` at the oldest date, as in seed_data's 60-day window
+    age = (periods - 1 - np.arange(periods)) / max(periods, 1)
+    trend = 1 + rng.uniform(-0.1, 0.1, size=(n, 1)) * age[None, :]
+    noise = rng.uniform(0.98, 1.02, size=(n, periods))
+    weekday = np.where(
+        (dates.weekday.to_numpy() < 5)[None, :],
+        rng.uniform(1.01, 1.03, size=(n, periods)),
+        1.0
+    )
+    return np.round(base * seasonal * trend * noise * weekday, 2)
+
+def generate_price_frames(
+    commodity_ids: Sequence,
+    profiles: Sequence[CommodityProfile],
+    dates: pd.DatetimeIndex,
+    seed: int = 0,
+    chunk_commodities: int = 100,
+    source: str = "synthetic"
+) -> Iterator[pd.DataFrame]:
+    """Price rows for `chunk_commodities` commodities at a time"""
+    rng = np.random.default_rng(seed)
+    periods = len(dates)
+    for start in range(0, len(profiles), chunk_commodities):
+        ids = np.asarray(commodity_ids[start:start + chunk_commodities])
+        chunk = profiles[start:start + chunk_commodities]
+        prices = generate_price_matrix(chunk, dates, rng)
+        yield pd.DataFrame({
+            "commodity_id": np.repeat(ids, periods),
+            "price": prices.ravel(),
+            "currency": "INR",
+            "timestamp": np.tile(dates.to_numpy(), len(chunk)),
+            "source": source,
+            "volume": rng.integers(100, 1001, size=len(chunk) * periods),
+        })
+
+def insert_commodities(db: Session, profiles: Sequence[CommodityProfile]) -> List:
+    """
+    Bulk insert commodity rows and return their ids in profile order;
+    commodities that already exist (names are unique) are reused
+    """
+    existing = {name for name, in db.query(Commodity.name).all()}
+    insert_commodity_data(db, [{
+        "name": p.name,
+        "description": f"Synthetic {p.category.lower()} commodity",
+        "unit": "quintal",
+        "category": p.category,
+    } for p in profiles if p.name not in existing])
+    ids = dict(db.query(Commodity.name, Commodity.id).all())
+    return [ids[p.name] for p in profiles]
+
+def populate(
+    db: Session,
+    commodities: int,
+    periods: int,
+    freq: str = "daily",
+    seed: int = 0,
+    chunk_commodities: int = 100,
+    csv_dir: Optional[Path] = None
+) -> int:
+    """
+    Generate `commodities` x `periods` prices and store them with bulk
+    inserts, or as CSV chunks in `csv_dir`; returns the number of rows
+    """
+    profiles = make_profiles(commodities, seed)
+    if csv_dir is None:
+        commodity_ids = insert_commodities(db, profiles)
+    else:
+        csv_dir = Path(csv_dir)
+        csv_dir.mkdir(parents=True, exist_ok=True)
+        commodity_ids = list(range(1, commodities + 1))
+        pd.DataFrame({
+            "id": commodity_ids,
+            "name": [p.name for p in profiles],
+            "category": [p.category for p in profiles],
+            "unit": "quintal",
+        }).to_csv(csv_dir / "commodities.csv", index=False)
+
+    dates = price_dates(periods, freq)
+    rows = 0
+    started = time.perf_counter()
+    frames = generate_price_frames(commodity_ids, profiles, dates, seed, chunk_commodities)
+    for i, frame in enumerate(frames):
+        if csv_dir is None:
+            insert_price_frame(db, frame)
+        else:
+            frame.to_csv(csv_dir / f"prices-{i:05d}.csv", index=False, date_format="%Y-%m-%d %H:%M:%S")
+        rows += len(frame)
+        elapsed = time.perf_counter() - started
+        logger.info(f"Wrote {rows} prices ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    return rows
+
+def main():
+    from .database import SessionLocal, init_db
+
+    parser = argparse.ArgumentParser(description="Generate synthetic commodities and prices")
+    parser.add_argument("--commodities", type=int, default=100)
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--freq", choices=sorted(FREQUENCIES), default="daily")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-commodities", type=int, default=100,
+                        help="Commodities generated and written per batch")
+    parser.add_argument("--csv-dir", type=Path, default=None,
+                        help="Write CSV chunks here instead of inserting into the database")
+    args = parser.parse_args()
+
+    periods = int(round(args.years * (365 if args.freq == "daily" else 12)))
+    logging.basicConfig(level=logging.INFO)
+    db = None
+    if args.csv_dir is None:
+        init_db()
+        db = SessionLocal()
+    try:
+        rows = populate(db, args.commodities, periods, args.freq, args.seed, args.chunk_commodities, args.csv_dir)
+        print(f"Generated {rows} prices for {args.commodities} commodities")
+    finally:
+        if db is not None:
+            db.close()
+
+if __name__ == "__main__":
+    main()
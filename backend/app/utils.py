@@ -1,12 +1,12 @@
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence
 from datetime import datetime
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from .models.commodity import Commodity
-from .models.price import Price
-from .models.prediction import Prediction
-from .models.lstm_arima import LSTMARIMAModel
+from .models.commodity import Commodity, Price, Prediction, Model
+from .catalog import catalog_versions
+from .events import publish_price_frame, publish_price_records
 
 def read_csv_file(file_path: str) -> pd.DataFrame:
     """Read a CSV file and return a pandas DataFrame"""
@@ -20,76 +20,162 @@ def process_commodity_csv(df: pd.DataFrame) -> List[Dict[str, Any]]:
     required_columns = ['name', 'description', 'unit', 'category']
     if not all(col in df.columns for col in required_columns):
         raise ValueError("CSV file missing required columns")
-    
-    commodities = []
-    for _, row in df.iterrows():
-        commodity = {
-            'name': row['name'],
-            'description': row['description'],
-            'unit': row['unit'],
-            'category': row['category'],
-            'created_at': datetime.now(),
-            'updated_at': datetime.now()
-        }
-        commodities.append(commodity)
-    return commodities
+
+    # One timestamp for the whole batch instead of one per row
+    now = datetime.now()
+    commodities = df[required_columns]
+    commodities = commodities.assign(created_at=now, updated_at=now)
+    return _to_records(commodities)
 
 def process_price_csv(df: pd.DataFrame) -> List[Dict[str, Any]]:
     """Process price CSV data and return a list of dictionaries"""
     required_columns = ['commodity_id', 'price', 'date']
     if not all(col in df.columns for col in required_columns):
         raise ValueError("CSV file missing required columns")
-    
-    prices = []
-    for _, row in df.iterrows():
-        price = {
-            'commodity_id': row['commodity_id'],
-            'price': float(row['price']),
-            'date': pd.to_datetime(row['date']),
-            'created_at': datetime.now()
-        }
-        prices.append(price)
-    return prices
+
+    # Whole-frame conversions: one dtype cast and one to_datetime call
+    prices = pd.DataFrame({
+        'commodity_id': df['commodity_id'],
+        'price': df['price'].astype('float64'),
+        'timestamp': pd.to_datetime(df['date']),
+    })
+    return _to_records(prices)
+
+def _to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Convert a frame to DB-ready records with native Python datetimes"""
+    df = df.copy()
+    for col in df.select_dtypes(include=['datetime64[ns]', 'datetimetz']).columns:
+        df[col] = pd.Series(df[col].dt.to_pydatetime(), index=df.index, dtype=object)
+    return df.to_dict('records')
 
 def save_predictions_to_csv(predictions: List[Dict[str, Any]], file_path: str):
     """Save predictions to a CSV file"""
     df = pd.DataFrame(predictions)
     df.to_csv(file_path, index=False)
 
-def insert_commodity_data(db: Session, commodities: List[Dict[str, Any]]):
-    """Insert commodity data into the database"""
-    for commodity_data in commodities:
-        commodity = Commodity(**commodity_data)
-        db.add(commodity)
-    db.commit()
+def insert_commodity_data(db: Session, commodities: List[Dict[str, Any]], chunk_size: int = 10000):
+    """Insert commodity data into the database using bulk inserts"""
+    _bulk_insert(db, Commodity, commodities, chunk_size)
+    catalog_versions.invalidate()
+
+def insert_price_data(db: Session, prices: List[Dict[str, Any]], chunk_size: int = 10000):
+    """Insert price data into the database using bulk inserts"""
+    _bulk_insert(db, Price, prices, chunk_size)
+    catalog_versions.invalidate()
+    publish_price_records(prices)
 
-def insert_price_data(db: Session, prices: List[Dict[str, Any]]):
-    """Insert price data into the database"""
-    for price_data in prices:
-        price = Price(**price_data)
-        db.add(price)
-    db.commit()
+def insert_price_frame(db: Session, prices: pd.DataFrame, chunk_size: int = 10000):
+    """Insert a frame of price rows (Price column names) using bulk inserts"""
+    _bulk_insert(db, Price, _to_records(prices), chunk_size)
+    catalog_versions.invalidate()
+    publish_price_frame(prices)
+
+def _bulk_insert(db: Session, model, records: List[Dict[str, Any]], chunk_size: int):
+    """Insert records with one executemany per chunk and a single commit"""
+    try:
+        table = model.__table__
+        for start in range(0, len(records), chunk_size):
+            db.execute(table.insert(), records[start:start + chunk_size])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
 
 def get_price_data_for_commodity(db: Session, commodity_id: int) -> np.ndarray:
     """Get historical price data for a commodity"""
-    prices = db.query(Price).filter(Price.commodity_id == commodity_id).order_by(Price.date).all()
-    return np.array([price.price for price in prices])
-
-def save_prediction(db: Session, commodity_id: int, predictions: np.ndarray, model_name: str):
-    """Save prediction results to the database"""
-    for i, pred_value in enumerate(predictions):
-        prediction = Prediction(
-            commodity_id=commodity_id,
-            value=float(pred_value),
-            prediction_date=datetime.now(),
-            model_name=model_name,
-            days_ahead=i + 1
-        )
-        db.add(prediction)
-    db.commit()
-
-def load_and_prepare_model() -> LSTMARIMAModel:
+    prices = db.query(Price.price).filter(Price.commodity_id == commodity_id).order_by(Price.timestamp).all()
+    return np.array([price for price, in prices], dtype=float)
+
+def get_model_id(db: Session, model_name: str) -> Optional[int]:
+    """Resolve a model name such as 'lstm' or 'arima' to its models.id"""
+    return db.query(Model.id).filter(Model.type == model_name.upper()).scalar()
+
+def build_prediction_records(
+    commodity_id,
+    model_id: int,
+    predictions: Sequence[float],
+    target_dates: Sequence[datetime],
+    confidence_lower: Optional[Sequence[float]] = None,
+    confidence_upper: Optional[Sequence[float]] = None,
+    prediction_date: Optional[datetime] = None,
+    run_type: str = "on_demand"
+) -> List[Dict[str, Any]]:
+    """Rows of one forecast run, ready for insert_prediction_records"""
+    predictions = np.asarray(predictions, dtype=float)
+    if len(target_dates) != len(predictions):
+        raise ValueError("predictions and target_dates must have the same length")
+
+    prediction_date = prediction_date or datetime.utcnow()
+    lower = predictions if confidence_lower is None else np.asarray(confidence_lower, dtype=float)
+    upper = predictions if confidence_upper is None else np.asarray(confidence_upper, dtype=float)
+
+    return [{
+        'commodity_id': commodity_id,
+        'model_id': model_id,
+        'predicted_price': value,
+        'confidence_lower': low,
+        'confidence_upper': high,
+        'prediction_date': prediction_date,
+        'target_date': target_date,
+        'horizon': step,
+        'run_type': run_type,
+        'created_at': prediction_date
+    } for step, (value, low, high, target_date) in enumerate(zip(
+        predictions.tolist(), lower.tolist(), upper.tolist(), target_dates
+    ), start=1)]
+
+def insert_prediction_records(db: Session, records: List[Dict[str, Any]], chunk_size: int = 10000):
+    """Insert prediction rows (possibly from many runs) using bulk inserts"""
+    _bulk_insert(db, Prediction, records, chunk_size)
+
+def save_prediction(
+    db: Session,
+    commodity_id,
+    model_id: int,
+    predictions: Sequence[float],
+    target_dates: Sequence[datetime],
+    confidence_lower: Optional[Sequence[float]] = None,
+    confidence_upper: Optional[Sequence[float]] = None,
+    prediction_date: Optional[datetime] = None,
+    run_type: str = "on_demand"
+) -> datetime:
+    """
+    Save one forecast run to the database with a single bulk insert.
+    All rows of the run share the same prediction_date, which is returned
+    so callers can refer to the run later.
+    """
+    prediction_date = prediction_date or datetime.utcnow()
+    records = build_prediction_records(
+        commodity_id, model_id, predictions, target_dates,
+        confidence_lower, confidence_upper, prediction_date, run_type
+    )
+    _bulk_insert(db, Prediction, records, chunk_size=len(records) or 1)
+    return prediction_date
+
+def get_latest_prediction(db: Session, commodity_id, model_id: int) -> List[Prediction]:
+    """
+    Return the rows of the most recent forecast run for a commodity/model.
+    Both queries are served by the ix_predictions_latest index.
+    """
+    latest_run = db.query(func.max(Prediction.prediction_date))\
+        .filter(Prediction.commodity_id == commodity_id, Prediction.model_id == model_id)\
+        .scalar()
+    if latest_run is None:
+        return []
+
+    return db.query(Prediction)\
+        .filter(
+            Prediction.commodity_id == commodity_id,
+            Prediction.model_id == model_id,
+            Prediction.prediction_date == latest_run
+        )\
+        .order_by(Prediction.target_date)\
+        .all()
+
+def load_and_prepare_model() -> "LSTMARIMAModel":
     """Load and prepare the LSTM-ARIMA model"""
+    # Imported here so that importing utils does not pull in TensorFlow
+    from .models.lstm_arima import LSTMARIMAModel
     model = LSTMARIMAModel()
     try:
         model.load_models()
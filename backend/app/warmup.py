@@ -0,0 +1,136 @@
+"""
+Startup preload and warm-up.
+
+`preload()` runs when the app is imported, so under serve.py it runs once
+in the gunicorn master and the loaded models are shared by the forked
+workers via copy-on-write. `warm_up()` runs in each worker after startup:
+it loads the catalog cache, sends a few read-only requests through the
+app in-process (route, query compilation and serialization caches) and
+runs a dummy inference on every loaded model. /ready answers 503 until it
+has finished, so a load balancer only routes users to warm workers.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import List, Optional
+
+import httpx
+import numpy as np
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from .catalog import catalog_versions
+from .events import read_session
+from .ml_models.model_manager import model_manager
+
+logger = logging.getLogger(__name__)
+
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "true").lower() == "true"
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+# Seconds between attempts while the database is unavailable
+WARMUP_RETRY_INTERVAL = float(os.getenv("WARMUP_RETRY_INTERVAL", "5"))
+
+class Readiness:
+    def __init__(self):
+        self.status = "starting"
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.preloaded: List[str] = []
+        self.steps: List[dict] = []
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def record(self, name: str, started: float, error: Exception = None):
+        step = {"name": name, "duration_ms": round((time.perf_counter() - started) * 1000, 1)}
+        if error is not None:
+            step["error"] = str(error)
+        self.steps.append(step)
+
+    def snapshot(self) -> dict:
+        return {
+            "status": self.status,
+            "preloaded_models": self.preloaded,
+            "warmup_seconds": round(self.finished_at - self.started_at, 3)
+                if self.started_at and self.finished_at else None,
+            "steps": self.steps,
+        }
+
+readiness = Readiness()
+
+def preload():
+    """Load saved model artifacts into the model manager"""
+    if PRELOAD_MODELS:
+        readiness.preloaded = model_manager.load_saved_models()
+
+def load_catalog():
+    with read_session() as db:
+        return catalog_versions.get(db)
+
+def dummy_inference(model_name: str):
+    """One single and one batched forecast on a synthetic series"""
+    snapshot = model_manager.get_snapshot(model_name)
+    series = 1000.0 + 50.0 * np.sin(np.arange(model_manager.min_prices) / 7.0)
+    snapshot.predictor.predict(series, 1)
+    snapshot.predictor.predict_batch([series, series], [1, 2])
+
+async def warm_up(app):
+    """Populate caches and run a dummy inference, then mark the worker ready"""
+    readiness.status = "warming"
+    readiness.started_at = time.monotonic()
+    loop = asyncio.get_running_loop()
+
+    # The catalog is required: retry until the database answers
+    while True:
+        started = time.perf_counter()
+        try:
+            version = await loop.run_in_executor(None, load_catalog)
+            readiness.record("catalog", started)
+            break
+        except Exception as e:
+            readiness.record("catalog", started, e)
+            logger.warning(f"Warm-up could not load the catalog, retrying: {str(e)}")
+            await asyncio.sleep(WARMUP_RETRY_INTERVAL)
+
+    # Best effort from here on: a failing step is recorded but does not block readiness
+    paths = ["/api/commodities/", "/api/models/"]
+    if version.index.entries:
+        key = version.index.entries[0].key
+        paths += [f"/api/commodities/{key}", f"/api/predictions/historical/{key}", f"/api/predictions/latest/{key}"]
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://warmup") as client:
+        for path in paths:
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                error = None if response.status_code < 500 else RuntimeError(f"HTTP {response.status_code}")
+            except Exception as e:
+                error = e
+            readiness.record(f"GET {path}", started, error)
+
+    for model_name in sorted(model_manager.trained_models):
+        started = time.perf_counter()
+        try:
+            await loop.run_in_executor(None, dummy_inference, model_name)
+            readiness.record(f"inference {model_name}", started)
+        except Exception as e:
+            readiness.record(f"inference {model_name}", started, e)
+            logger.warning(f"Warm-up inference failed for {model_name}: {str(e)}")
+
+    readiness.finished_at = time.monotonic()
+    readiness.status = "ready"
+    logger.info(f"Warm-up finished in {readiness.finished_at - readiness.started_at:.2f}s")
+
+def start_warm_up(app) -> Optional[asyncio.Task]:
+    if not WARMUP_ENABLED:
+        readiness.status = "ready"
+        return None
+    return asyncio.get_running_loop().create_task(warm_up(app))
+
+router = APIRouter()
+
+@router.get("/ready", include_in_schema=False)
+async def ready():
+    """Readiness probe: 200 once warm-up has finished, 503 before"""
+    return JSONResponse(readiness.snapshot(), status_code=200 if readiness.ready else 503)
@@ -0,0 +1,72 @@
+"""
+Benchmark the CSV parsing helpers in app.utils against the previous
+row-by-row implementation.
+
+Run from the backend directory:
+    python -m benchmarks.bench_csv_processing --rows 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app.utils import read_csv_file, process_price_csv
+
+def legacy_process_price_csv(df: pd.DataFrame):
+    """Previous iterrows-based implementation, kept as the baseline"""
+    prices = []
+    for _, row in df.iterrows():
+        prices.append({
+            'commodity_id': row['commodity_id'],
+            'price': float(row['price']),
+            'timestamp': pd.to_datetime(row['date']),
+            'created_at': datetime.now()
+        })
+    return prices
+
+def write_synthetic_csv(path: str, rows: int, seed: int = 42):
+    """Write a synthetic price file with `rows` rows"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2000-01-01', periods=rows, freq='min')
+    df = pd.DataFrame({
+        'commodity_id': rng.integers(1, 100, size=rows),
+        'price': np.round(rng.uniform(100, 10000, size=rows), 2),
+        'date': dates.strftime('%Y-%m-%d %H:%M:%S'),
+    })
+    df.to_csv(path, index=False)
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark price CSV processing")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--legacy-rows', type=int, default=None,
+                        help="Rows to run through the legacy parser (default: all)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'prices.csv')
+        write_synthetic_csv(path, args.rows)
+        df = read_csv_file(path)
+
+    vectorized_time, records = time_call(process_price_csv, df)
+    print(f"vectorized: {len(records):>9} rows in {vectorized_time:8.3f}s "
+          f"({len(records) / vectorized_time:,.0f} rows/s)")
+
+    legacy_df = df if args.legacy_rows is None else df.head(args.legacy_rows)
+    legacy_time, legacy_records = time_call(legacy_process_price_csv, legacy_df)
+    print(f"legacy:     {len(legacy_records):>9} rows in {legacy_time:8.3f}s "
+          f"({len(legacy_records) / legacy_time:,.0f} rows/s)")
+
+    speedup = (legacy_time / len(legacy_records)) / (vectorized_time / len(records))
+    print(f"speedup:    {speedup:.1f}x per row")
+
+if __name__ == "__main__":
+    main()
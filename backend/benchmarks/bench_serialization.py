@@ -0,0 +1,125 @@
+"""
+Benchmark the historical-prices response path: ORM objects, per-row
+strftime, pydantic validation and json.dumps (previous) against Core
+rows, vectorized date formatting and orjson (current).
+
+Run from the backend directory:
+    python -m benchmarks.bench_serialization --rows 100000
+"""
+import argparse
+import gzip
+import json
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.commodity import Commodity, Price
+from app.serialization import fast_response, iso_dates
+
+class PricePoint(BaseModel):
+    date: str
+    price: float
+    volume: Optional[int]
+
+class HistoricalResponse(BaseModel):
+    commodity: str
+    prices: List[PricePoint]
+
+def make_session(rows: int, seed: int = 42):
+    """In-memory SQLite session holding one commodity with `rows` prices"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(Commodity(id=1, name="Wheat", category="Grains", unit="quintal"))
+    db.commit()
+
+    rng = np.random.default_rng(seed)
+    start = datetime(2000, 1, 1)
+    db.execute(Price.__table__.insert(), [{
+        "commodity_id": 1,
+        "price": float(price),
+        "volume": int(volume),
+        "timestamp": start + timedelta(hours=i)
+    } for i, (price, volume) in enumerate(zip(
+        rng.uniform(1000, 5000, size=rows),
+        rng.integers(10, 1000, size=rows)
+    ))])
+    db.commit()
+    return db
+
+def legacy_body(db, rows: int) -> bytes:
+    """Previous path: ORM query, strftime per row, response_model validation, json.dumps"""
+    prices = db.query(Price)\
+        .filter(Price.commodity_id == 1)\
+        .order_by(Price.timestamp.desc())\
+        .limit(rows)\
+        .all()
+    payload = {
+        "commodity": "Wheat",
+        "prices": [{
+            "date": p.timestamp.strftime("%Y-%m-%d"),
+            "price": p.price,
+            "volume": p.volume
+        } for p in prices]
+    }
+    validated = HistoricalResponse(**payload)
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+def fast_body(db, rows: int) -> bytes:
+    """Current path: Core rows, vectorized dates, orjson"""
+    prices = Price.__table__
+    result = db.execute(
+        select(prices.c.timestamp, prices.c.price, prices.c.volume)
+        .where(prices.c.commodity_id == 1)
+        .order_by(prices.c.timestamp.desc())
+        .limit(rows)
+    ).all()
+    timestamps, values, volumes = zip(*result)
+    return fast_response({
+        "commodity": "Wheat",
+        "prices": [
+            {"date": date, "price": price, "volume": volume}
+            for date, price, volume in zip(iso_dates(timestamps), values, volumes)
+        ]
+    }).body
+
+def best_of(func, repeat: int, *args):
+    """Fastest of `repeat` runs and the last result"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark historical price serialization")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    db = make_session(args.rows)
+    try:
+        legacy_time, legacy = best_of(legacy_body, args.repeat, db, args.rows)
+        fast_time, fast = best_of(fast_body, args.repeat, db, args.rows)
+    finally:
+        db.close()
+
+    if json.loads(legacy) != json.loads(fast):
+        raise SystemExit("Serialized payloads differ")
+
+    print(f"legacy: {args.rows:>9} rows in {legacy_time:8.3f}s ({len(legacy):,} bytes)")
+    print(f"fast:   {args.rows:>9} rows in {fast_time:8.3f}s ({len(fast):,} bytes)")
+    print(f"speedup: {legacy_time / fast_time:.1f}x")
+    print(f"gzip:   {len(gzip.compress(fast)):,} bytes on the wire with GZipMiddleware")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Open-loop load generator for the API.
+
+Requests are started at a target rate (fixed interval or Poisson arrivals)
+regardless of how fast earlier ones complete, with a weighted mix of
+commodity listing, historical prices and /predict calls. Latency is
+measured from each request's scheduled start, so client-side queueing
+under overload shows up in the percentiles instead of being hidden.
+
+Run from the backend directory, in-process against a synthetic SQLite
+database:
+    python -m benchmarks.loadtest --synthetic 50 --rate 100 --duration 30
+or against a running server:
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --rate 200 \\
+        --mix commodities=5,historical=4,predict=1 --output load.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+DEFAULT_MIX = "commodities=5,historical=4,predict=1"
+ENDPOINTS = ("commodities", "historical", "predict")
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name}' in mix (expected one of {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+class LoadStats:
+    """Latencies and outcomes per endpoint"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.dropped: Dict[str, int] = defaultdict(int)
+
+    def record(self, endpoint: str, latency: float, status: str):
+        self.latencies[endpoint].append(latency)
+        self.statuses[endpoint][status] += 1
+
+    def summary(self, elapsed: float) -> Dict:
+        report = {}
+        for endpoint in sorted(set(self.latencies) | set(self.dropped)):
+            latencies = np.asarray(self.latencies[endpoint]) * 1000.0
+            statuses = dict(self.statuses[endpoint])
+            completed = len(latencies)
+            errors = sum(count for status, count in statuses.items() if not status.startswith("2") and status != "304")
+            entry = {
+                "requests": completed + self.dropped[endpoint],
+                "completed": completed,
+                "dropped": self.dropped[endpoint],
+                "errors": errors,
+                "error_rate": round(errors / completed, 4) if completed else 0.0,
+                "throughput_rps": round(completed / elapsed, 2) if elapsed else 0.0,
+                "statuses": statuses,
+            }
+            if completed:
+                entry.update({
+                    "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+                    "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+                    "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+                    "max_ms": round(float(latencies.max()), 3),
+                    "mean_ms": round(float(latencies.mean()), 3),
+                })
+            report[endpoint] = entry
+        return report
+
+class LoadGenerator:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        mix: Dict[str, float],
+        commodities: List[str],
+        horizons: List[int],
+        model_name: str,
+        seed: int = 0
+    ):
+        self.client = client
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.commodities = commodities
+        self.horizons = horizons
+        self.model_name = model_name
+        self.rng = random.Random(seed)
+        self.stats = LoadStats()
+        self.in_flight = 0
+
+    def next_request(self):
+        endpoint = self.rng.choices(self.names, self.weights)[0]
+        if endpoint == "commodities":
+            return endpoint, "GET", "/api/commodities/", None
+        commodity = self.rng.choice(self.commodities)
+        if endpoint == "historical":
+            return endpoint, "GET", f"/api/predictions/historical/{commodity}", None
+        return endpoint, "POST", "/api/predictions/predict", {
+            "commodity_id": commodity,
+            "model_name": self.model_name,
+            "prediction_horizon": self.rng.choice(self.horizons),
+        }
+
+    async def send(self, endpoint: str, method: str, path: str, body: Optional[dict], scheduled: float):
+        self.in_flight += 1
+        try:
+            response = await self.client.request(method, path, json=body)
+            status = str(response.status_code)
+        except Exception as e:
+            status = type(e).__name__
+        finally:
+            self.in_flight -= 1
+        self.stats.record(endpoint, time.perf_counter() - scheduled, status)
+
+    async def run(self, rate: float, duration: float, max_in_flight: int, poisson: bool = False) -> float:
+        """Issue requests for `duration` seconds; returns the elapsed time including the drain"""
+        tasks = set()
+        start = time.perf_counter()
+        next_at = start
+        while next_at - start < duration:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            endpoint, method, path, body = self.next_request()
+            if self.in_flight >= max_in_flight:
+                # The client is saturated; count it rather than queue without bound
+                self.stats.dropped[endpoint] += 1
+            else:
+                task = asyncio.ensure_future(self.send(endpoint, method, path, body, next_at))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            next_at += self.rng.expovariate(rate) if poisson else 1.0 / rate
+        if tasks:
+            await asyncio.gather(*tasks)
+        return time.perf_counter() - start
+
+async def discover_commodities(client: httpx.AsyncClient) -> List[str]:
+    response = await client.get("/api/commodities/")
+    response.raise_for_status()
+    return [item["id"] for item in response.json()]
+
+def in_process_app(synthetic: int, days: int, workdir: str):
+    """main.app backed by a synthetic SQLite database"""
+    from app.catalog import catalog_versions
+    from app.database import SessionLocal, get_db, get_read_db
+    from app.jobs.precompute_forecasts import precompute_forecasts
+    from benchmarks.suite import make_database
+    from main import app
+
+    if synthetic:
+        engine, session_factory = make_database(str(Path(workdir) / "load.db"), synthetic, days, seed=42)
+
+        def get_test_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = get_test_db
+        app.dependency_overrides[get_read_db] = get_test_db
+        # Background and executor jobs open their own sessions
+        SessionLocal.configure(bind=engine)
+        catalog_versions.invalidate()
+        db = session_factory()
+        try:
+            precompute_forecasts(db)
+        finally:
+            db.close()
+    return app
+
+async def run(args) -> Dict:
+    mix = parse_mix(args.mix)
+    horizons = [int(h) for h in args.horizons.split(",")]
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    timeout = httpx.Timeout(args.timeout)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, limits=limits, timeout=timeout)
+        else:
+            app = in_process_app(args.synthetic, args.days, workdir)
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=timeout)
+
+        async with client:
+            commodities = args.commodity or await discover_commodities(client)
+            if not commodities and set(mix) - {"commodities"}:
+                raise SystemExit("No commodities found; pass --commodity or --synthetic")
+
+            generator = LoadGenerator(client, mix, commodities, horizons, args.model, args.seed)
+            if args.warmup:
+                await generator.run(args.rate, args.warmup, args.max_in_flight, args.poisson)
+                generator.stats = LoadStats()
+            elapsed = await generator.run(args.rate, args.duration, args.max_in_flight, args.poisson)
+
+    stats = generator.stats
+    endpoints = stats.summary(elapsed)
+    total = LoadStats()
+    for endpoint, latencies in stats.latencies.items():
+        for latency in latencies:
+            total.latencies["all"].append(latency)
+        for status, count in stats.statuses[endpoint].items():
+            total.statuses["all"][status] += count
+        total.dropped["all"] += stats.dropped[endpoint]
+    return {
+        "params": {key: value for key, value in vars(args).items() if key != "output"},
+        "elapsed_seconds": round(elapsed, 3),
+        "endpoints": endpoints,
+        "total": total.summary(elapsed).get("all", {}),
+    }
+
+def print_report(report: Dict):
+    header = f"{'endpoint':<12} {'reqs':>7} {'err%':>6} {'drop':>6} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["endpoints"].items()) + [("total", report["total"])]
+    for name, entry in rows:
+        print(
+            f"{name:<12} {entry.get('requests', 0):>7} {entry.get('error_rate', 0) * 100:>5.1f}% "
+            f"{entry.get('dropped', 0):>6} {entry.get('throughput_rps', 0):>8.1f} "
+            f"{entry.get('p50_ms', float('nan')):>7.1f}ms {entry.get('p95_ms', float('nan')):>7.1f}ms "
+            f"{entry.get('p99_ms', float('nan')):>7.1f}ms"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the API at a target request rate")
+    parser.add_argument("--url", default=None, help="Base URL of a running server (default: in-process ASGI)")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="In-process only: serve N synthetic commodities from a temporary SQLite database")
+    parser.add_argument("--days", type=int, default=6 * 365,
+                        help="Daily prices per synthetic commodity (forecasts need 60 months)")
+    parser.add_argument("--rate", type=float, default=50.0, help="Requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=0.0, help="Seconds of unmeasured load first")
+    parser.add_argument("--poisson", action="store_true", help="Poisson arrivals instead of a fixed interval")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Endpoint weights, e.g. " + DEFAULT_MIX)
+    parser.add_argument("--commodity", action="append", default=None,
+                        help="Commodity id or name to request (repeatable; default: all listed)")
+    parser.add_argument("--horizons", default="1,3,6,12", help="Prediction horizons to pick from")
+    parser.add_argument("--model", default="lstm_arima")
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
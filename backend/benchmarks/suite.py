@@ -0,0 +1,291 @@
+"""
+Benchmark suite covering ingestion, catalog queries, model training and
+inference and the /predict endpoint. Everything runs locally against a
+temporary SQLite database filled with synthetic series, and results are
+written as JSON so runs can be compared over time.
+
+Run from the backend directory:
+    python -m benchmarks.suite --commodities 20 --days 2190 --output results.json
+    python -m benchmarks.suite --only listing historical --repeat 20
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.catalog import catalog_versions
+from app.database import Base
+from app.models.commodity import Model
+
+CSV_FILES = ['wheat-60.csv', 'rice-60.csv', 'corn-60.csv', 'bananas-60.csv', 'tea-60.csv']
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency statistics in milliseconds"""
+    ms = np.asarray(samples) * 1000.0
+    return {
+        "runs": len(samples),
+        "min_ms": round(float(ms.min()), 3),
+        "median_ms": round(float(np.median(ms)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+    }
+
+def measure(func: Callable, repeat: int, warmup: int = 1) -> Dict[str, float]:
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+def synthetic_prices(commodities: int, periods: int, seed: int, freq: str = "daily"):
+    """Dates and a (commodities, periods) price matrix from the app's synthetic market model"""
+    from app.synthetic import generate_price_matrix, make_profiles, price_dates
+
+    dates = price_dates(periods, freq)
+    return dates, generate_price_matrix(make_profiles(commodities, seed), dates, np.random.default_rng(seed))
+
+def make_database(path: str, commodities: int, days: int, seed: int):
+    """SQLite database with `commodities` x `days` synthetic daily prices and the model rows"""
+    from app.synthetic import populate
+
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = session_factory()
+    try:
+        # Commodities and prices go in with the same bulk inserts as app.synthetic
+        populate(db, commodities, days, "daily", seed)
+        db.add_all([
+            Model(name="LSTM Price Predictor", type="LSTM", status="active"),
+            Model(name="ARIMA Price Predictor", type="ARIMA", status="active"),
+        ])
+        db.commit()
+    finally:
+        db.close()
+    return engine, session_factory
+
+def write_synthetic_csvs(directory: Path, months: int, seed: int):
+    """Monthly price files in the layout load_csv_data reads"""
+    dates, prices = synthetic_prices(len(CSV_FILES), months, seed, "monthly")
+    labels = [date.strftime('%b %Y') for date in dates]
+    for name, series in zip(CSV_FILES, prices):
+        lines = ['"Synthetic - Monthly Price"', '"Rupee per Metric Ton"']
+        lines.extend(f'"{label}","{price:.2f}"' for label, price in zip(labels, series))
+        (directory / name).write_text("\n".join(lines) + "\n")
+
+def bench_load_csv(args, workdir: Path) -> Dict:
+    from app.data_loader import load_csv_data
+
+    csv_dir = workdir / "csv"
+    csv_dir.mkdir(exist_ok=True)
+    write_synthetic_csvs(csv_dir, args.csv_months, args.seed)
+    engine = create_engine(f"sqlite:///{workdir / 'csv.db'}")
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+
+    def run():
+        db = session_factory()
+        try:
+            load_csv_data(db, csv_dir)
+        finally:
+            db.close()
+
+    result = measure(run, args.repeat_slow)
+    rows = args.csv_months * len(CSV_FILES)
+    result["rows"] = rows
+    result["rows_per_second"] = round(rows / (result["median_ms"] / 1000.0), 1)
+    engine.dispose()
+    return result
+
+def bench_listing(args, session_factory) -> Dict:
+    from app.routers.commodities import fetch_commodities
+
+    def run():
+        db = session_factory()
+        try:
+            fetch_commodities(db)
+        finally:
+            db.close()
+
+    result = measure(run, args.repeat)
+    result["commodities"] = args.commodities
+    return result
+
+def bench_historical(args, session_factory) -> Dict:
+    from sqlalchemy import select
+    from app.models.commodity import Price
+    from app.serialization import iso_dates
+
+    prices = Price.__table__
+    rng = np.random.default_rng(args.seed)
+    results = {}
+    for days in (30, 365, args.days):
+        def run():
+            commodity_id = int(rng.integers(1, args.commodities + 1))
+            db = session_factory()
+            try:
+                rows = db.execute(
+                    select(prices.c.timestamp, prices.c.price, prices.c.volume)
+                    .where(prices.c.commodity_id == commodity_id)
+                    .order_by(prices.c.timestamp.desc())
+                    .limit(days)
+                ).all()
+                timestamps = [row.timestamp for row in rows]
+                iso_dates(timestamps)
+            finally:
+                db.close()
+        results[f"last_{days}_days"] = measure(run, args.repeat)
+    return results
+
+def bench_model(args, model_name: str, workdir: Path) -> Dict:
+    from app.ml_models.backtest import create_predictor
+
+    _, prices = synthetic_prices(1, args.days, args.seed)
+    series = prices[0]
+    results = {}
+
+    def fit():
+        predictor = create_predictor(model_name, str(workdir))
+        if model_name == "lstm":
+            predictor.epochs = args.lstm_epochs
+        predictor.train(series)
+        return predictor
+
+    fit_samples = []
+    predictor = None
+    for _ in range(args.repeat_slow):
+        start = time.perf_counter()
+        predictor = fit()
+        fit_samples.append(time.perf_counter() - start)
+    results["fit"] = summarize(fit_samples)
+    results["fit"]["train_points"] = len(series)
+    if model_name == "lstm":
+        results["fit"]["epochs"] = args.lstm_epochs
+
+    for horizon in (1, 12, 30):
+        results[f"predict_{horizon}_steps"] = measure(lambda: predictor.predict(series, horizon), args.repeat)
+    return results
+
+def bench_predict_endpoint(args, session_factory) -> Dict:
+    from fastapi.testclient import TestClient
+    from app.database import SessionLocal, engine, get_db, get_read_db
+    from app.jobs.precompute_forecasts import precompute_forecasts
+    from main import app
+
+    def get_test_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = get_test_db
+    app.dependency_overrides[get_read_db] = get_test_db
+    # On-demand forecasts run in a session of their own
+    SessionLocal.configure(bind=session_factory.kw["bind"])
+    try:
+        db = session_factory()
+        try:
+            precompute_forecasts(db)
+        finally:
+            db.close()
+
+        client = TestClient(app)
+        rng = np.random.default_rng(args.seed)
+        results = {}
+        # Horizon 6 is served from the precomputed table, 5 is computed on demand
+        for label, horizon in (("precomputed", 6), ("on_demand", 5)):
+            def run():
+                response = client.post("/api/predictions/predict", json={
+                    "commodity_id": str(int(rng.integers(1, args.commodities + 1))),
+                    "model_name": "lstm_arima",
+                    "prediction_horizon": horizon
+                })
+                response.raise_for_status()
+            results[label] = measure(run, args.repeat)
+        return results
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_read_db, None)
+        SessionLocal.configure(bind=engine)
+
+BENCHMARKS = ["load_csv", "listing", "historical", "arima", "lstm", "predict_endpoint"]
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return ""
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the backend benchmark suite")
+    parser.add_argument("--commodities", type=int, default=20)
+    parser.add_argument("--days", type=int, default=6 * 365,
+                        help="Daily prices per commodity (forecasts need 60 months)")
+    parser.add_argument("--csv-months", type=int, default=600, help="Rows per CSV file for load_csv_data")
+    parser.add_argument("--lstm-epochs", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20, help="Runs of fast benchmarks")
+    parser.add_argument("--repeat-slow", type=int, default=3, help="Runs of ingestion and model fits")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument("--output", default=None, help="JSON file (default: benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args()
+
+    output = Path(args.output) if args.output else \
+        Path(__file__).parent / "results" / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {key: value for key, value in vars(args).items() if key != "output"},
+        },
+        "results": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        engine, session_factory = make_database(str(workdir / "bench.db"), args.commodities, args.days, args.seed)
+        catalog_versions.invalidate()
+
+        for name in args.only:
+            print(f"Running {name}...", flush=True)
+            start = time.perf_counter()
+            if name == "load_csv":
+                result = bench_load_csv(args, workdir)
+            elif name == "listing":
+                result = bench_listing(args, session_factory)
+            elif name == "historical":
+                result = bench_historical(args, session_factory)
+            elif name in ("arima", "lstm"):
+                result = bench_model(args, name, workdir)
+            else:
+                result = bench_predict_endpoint(args, session_factory)
+            report["results"][name] = result
+            print(f"  done in {time.perf_counter() - start:.1f}s", flush=True)
+        engine.dispose()
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(json.dumps(report["results"], indent=2))
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ print("Initializing database...")
 
 from app.database import init_db, SessionLocal
 from app.init_db import seed_data
+from app.jobs.precompute_forecasts import run_precompute_forecasts
 
 def main():
     try:
@@ -17,6 +18,9 @@ def main():
         finally:
             db.close()
 
+        result = run_precompute_forecasts()
+        print(f"Precomputed {result['runs']} forecast runs")
+
     except Exception as e:
         print(f"Error initializing database: {str(e)}")
         raise
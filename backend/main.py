@@ -1,6 +1,23 @@
+# Thread limits have to be in the environment before NumPy, BLAS and TensorFlow load
+from app.cpu_budget import cpu_budget, get_cpu_diagnostics
+cpu_budget.apply()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import predictions, commodities, models
+from app.routers import predictions, commodities, models, stream
+from app.jobs.scheduler import start_scheduled_jobs
+from app.jobs.accuracy_backfill import run_accuracy_backfill, BACKFILL_INTERVAL
+from app.jobs.precompute_forecasts import run_precompute_forecasts, PRECOMPUTE_INTERVAL
+from app.admission import get_admission_stats
+from app.executors import get_executor_stats
+from app.database import get_database_stats
+from app.instrumentation import MetricsMiddleware, router as metrics_router
+from app.profiling import ProfilingMiddleware, router as profiles_router
+from app.events import EventStreamGZipMiddleware
+from app.warmup import preload, start_warm_up, router as readiness_router
+
+# Saved models are loaded at import, i.e. once in the serve.py master before it forks
+preload()
 
 app = FastAPI(
     title="Agricultural Commodity Price Prediction API",
@@ -17,10 +34,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large payloads such as long price histories (live event streams are left uncompressed)
+app.add_middleware(EventStreamGZipMiddleware, minimum_size=1024)
+
+# Opt-in cProfile of single requests (admin header or PROFILING_SAMPLE_RATE)
+app.add_middleware(ProfilingMiddleware)
+
+# Latency and query counts per route (outermost, so it times the whole stack)
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(commodities.router, prefix="/api/commodities", tags=["commodities"])
 app.include_router(predictions.router, prefix="/api/predictions", tags=["predictions"])
 app.include_router(models.router, prefix="/api/models", tags=["models"])
+app.include_router(stream.router, prefix="/api/stream", tags=["stream"])
+app.include_router(metrics_router)
+app.include_router(readiness_router)
+app.include_router(profiles_router, prefix="/api/profiles", tags=["profiling"])
+
+@app.on_event("startup")
+async def start_jobs():
+    """Start warm-up and, in at most one process, the background jobs"""
+    start_warm_up(app)
+    start_scheduled_jobs([
+        (run_accuracy_backfill, BACKFILL_INTERVAL, "accuracy_backfill"),
+        (run_precompute_forecasts, PRECOMPUTE_INTERVAL, "precompute_forecasts"),
+    ])
+
+@app.get("/api/admission/stats")
+async def admission_stats():
+    """Queue depth and rejection counts per route class, executor backlog and database pools"""
+    return {
+        "limiters": get_admission_stats(),
+        "executors": get_executor_stats(),
+        "database": get_database_stats()
+    }
+
+@app.get("/api/system/cpu")
+async def cpu_diagnostics():
+    """CPU thread budget of this worker and the thread pools in effect"""
+    return get_cpu_diagnostics()
 
 @app.get("/")
 async def root():
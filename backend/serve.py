@@ -0,0 +1,77 @@
+"""
+Production entry point: a gunicorn master with uvicorn workers.
+
+The app (and with it the saved models, see app/warmup.py) is imported once
+in the master before the workers are forked, so they share those pages
+copy-on-write instead of each loading its own copy. Every worker then
+warms up on its own and reports ready at /ready.
+
+The periodic jobs (accuracy backfill, forecast precompute) are not
+scheduled in the workers by default; run them from cron instead:
+    python -m app.jobs.accuracy_backfill
+    python -m app.jobs.precompute_forecasts
+With SCHEDULED_JOBS=true, the one worker holding SCHEDULER_LOCK_FILE runs them.
+
+Run from the backend directory:
+    WEB_CONCURRENCY=4 BIND=0.0.0.0:8000 python serve.py
+For development, `uvicorn main:app --reload` serves the same app.
+"""
+import os
+
+# Decided before the app is imported: database pools are sized by the worker count
+WORKERS = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+os.environ["WEB_CONCURRENCY"] = str(WORKERS)
+os.environ.setdefault("SCHEDULED_JOBS", "false")
+
+from gunicorn.app.base import BaseApplication
+
+BIND = os.getenv("BIND", "0.0.0.0:8000")
+# Seconds a worker may spend on a request (model fits) before it is restarted
+WORKER_TIMEOUT = int(os.getenv("WORKER_TIMEOUT", "120"))
+# Recycle workers after this many requests (0 disables) to bound memory growth
+MAX_REQUESTS = int(os.getenv("MAX_REQUESTS", "0"))
+
+def post_fork(server, worker):
+    """Drop state a worker must not share with the master"""
+    import numpy as np
+    from app.instrumentation import instrument_pool, monitored_engines
+
+    # Connections opened in the master belong to it: give the worker a fresh,
+    # empty pool and leave the inherited ones untouched (closing them here
+    # would close the master's sockets too)
+    for engine in monitored_engines.values():
+        engine.pool = engine.pool.recreate()
+        instrument_pool(engine.pool)
+    # Otherwise every worker draws the same random sequence
+    np.random.seed()
+
+class Server(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from main import app
+        return app
+
+def main():
+    Server({
+        "bind": BIND,
+        "workers": WORKERS,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "post_fork": post_fork,
+        "timeout": WORKER_TIMEOUT,
+        "graceful_timeout": 30,
+        "keepalive": 5,
+        "max_requests": MAX_REQUESTS,
+        "max_requests_jitter": MAX_REQUESTS // 10,
+        "accesslog": "-",
+    }).run()
+
+if __name__ == "__main__":
+    main()
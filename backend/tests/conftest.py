@@ -0,0 +1,7 @@
+import os
+import sys
+from pathlib import Path
+
+# The app creates its engine at import; keep tests off the configured database
+os.environ["DATABASE_URL"] = "sqlite://"
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
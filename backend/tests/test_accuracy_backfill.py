@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.jobs.accuracy_backfill import (
+    BACKFILL_GRACE_DAYS,
+    merge_accuracy_totals,
+    unscored_predictions_query,
+)
+from app.models.commodity import ForecastAccuracy, Prediction
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+def scored(rows):
+    frame = pd.DataFrame(rows, columns=["model_id", "commodity_id", "horizon", "abs_error", "abs_pct_error"])
+    return frame.assign(sq_error=frame["abs_error"] ** 2)
+
+def totals(db, model_id, commodity_id, horizon):
+    return db.query(ForecastAccuracy).filter_by(
+        model_id=model_id, commodity_id=commodity_id, horizon=horizon
+    ).one()
+
+def test_merge_creates_one_row_per_group(db):
+    groups = merge_accuracy_totals(db, scored([
+        (1, 1, 1, 10.0, 0.10),
+        (1, 1, 1, 20.0, 0.20),
+        (1, 1, 3, 30.0, 0.30),
+        (2, 1, 1, 5.0, 0.05),
+    ]))
+
+    assert groups == 3
+    row = totals(db, 1, 1, 1)
+    assert row.count == 2
+    assert row.sum_abs_error == pytest.approx(30.0)
+    assert row.mae == pytest.approx(15.0)
+    assert row.mape == pytest.approx(0.15)
+    assert row.rmse == pytest.approx(((10.0 ** 2 + 20.0 ** 2) / 2) ** 0.5)
+    assert totals(db, 2, 1, 1).count == 1
+
+def test_merge_folds_into_existing_totals(db):
+    merge_accuracy_totals(db, scored([(1, 1, 1, 10.0, 0.10)]))
+    merge_accuracy_totals(db, scored([(1, 1, 1, 30.0, 0.30), (1, 1, 1, 20.0, 0.20)]))
+
+    assert db.query(ForecastAccuracy).count() == 1
+    row = totals(db, 1, 1, 1)
+    assert row.count == 3
+    assert row.mae == pytest.approx(20.0)
+    assert row.mape == pytest.approx(0.20)
+    assert row.sum_sq_error == pytest.approx(100.0 + 900.0 + 400.0)
+
+def test_unscored_predictions_skip_targets_past_the_grace_period(db):
+    now = datetime(2024, 6, 1)
+    targets = {
+        "future": now + timedelta(days=1),
+        "recent": now - timedelta(days=1),
+        "expired": now - timedelta(days=BACKFILL_GRACE_DAYS + 1),
+    }
+    for name, target_date in targets.items():
+        db.add(Prediction(model_id=1, commodity_id=1, horizon=1, predicted_price=1.0,
+                          target_date=target_date, prediction_date=now - timedelta(days=60)))
+    db.add(Prediction(model_id=1, commodity_id=1, horizon=1, predicted_price=1.0, accuracy=0.9,
+                      target_date=targets["recent"], prediction_date=now - timedelta(days=60)))
+    db.commit()
+
+    pending = db.execute(unscored_predictions_query(now)).all()
+
+    assert [row.target_date for row in pending] == [targets["recent"]]
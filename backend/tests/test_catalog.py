@@ -0,0 +1,86 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.catalog import CatalogVersions, CommodityEntry, CommodityIndex
+from app.database import Base
+from app.models.commodity import Commodity, Price
+
+@pytest.fixture
+def index():
+    return CommodityIndex([
+        CommodityEntry(1, "1", "Wheat", "Cereals"),
+        CommodityEntry(2, "2", "Rice", "Cereals"),
+        CommodityEntry(3, "3", "Green Tea", "Beverages"),
+        CommodityEntry(4, "4", "Wheat Flour", "Cereals"),
+    ])
+
+@pytest.mark.parametrize("identifier, expected", [
+    ("2", 2),
+    (2, 2),
+    ("rice", 2),
+    ("RICE", 2),
+    ("rice-001", 2),
+    ("Green Tea", 3),
+    ("green-tea", 3),
+    ("greentea", 3),
+    ("wheat flour", 4),
+])
+def test_resolve_exact_aliases(index, identifier, expected):
+    assert index.resolve(identifier).id == expected
+
+def test_resolve_prefix_prefers_catalog_order(index):
+    assert index.resolve("whe").id == 1
+    assert index.resolve("wheat-f").id == 4
+
+def test_resolve_substring_of_name(index):
+    assert index.resolve("tea").id == 3
+
+@pytest.mark.parametrize("identifier", ["", "  ", "--", "barley", "99"])
+def test_resolve_unknown(index, identifier):
+    assert index.resolve(identifier) is None
+
+def test_resolve_unknown_numeric_id_is_not_a_prefix_match():
+    index = CommodityIndex([
+        CommodityEntry(10, "10", "Wheat", "Cereals"),
+        CommodityEntry(11, "11", "Rice", "Cereals"),
+        CommodityEntry(25, "25", "Commodity 0001", "Cereals"),
+    ])
+    assert index.resolve("10").id == 10
+    assert index.resolve("25").id == 25
+    assert index.resolve("1") is None
+    assert index.resolve("2") is None
+    assert index.resolve("0001") is None
+    assert index.resolve("commodity-0001").id == 25
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+def test_versions_reload_only_when_watermark_moves(db, monkeypatch):
+    db.add(Commodity(id=1, name="Wheat", category="Cereals"))
+    db.add(Price(commodity_id=1, price=10.0, timestamp=datetime(2024, 1, 1)))
+    db.commit()
+    versions = CatalogVersions(ttl_seconds=0)
+    loads = []
+    load = versions._load
+    monkeypatch.setattr(versions, "_load", lambda *args: loads.append(1) or load(*args))
+
+    first = versions.get(db)
+    assert versions.get(db).commodities == first.commodities
+    assert len(loads) == 1
+
+    db.add(Price(commodity_id=1, price=11.0, timestamp=datetime(2024, 2, 1)))
+    db.commit()
+    assert versions.get(db).commodities["1"].price_count == 2
+    assert len(loads) == 2